@@ -3,11 +3,12 @@ import openai
 import requests
 import os
 import re
-import time
 from dotenv import load_dotenv
 import html
 import random
 
+import rate_limit
+
 print("🚀 Starte News-Bot ...")
 load_dotenv()
 
@@ -119,6 +120,7 @@ def upload_image_to_wp(image_url, wp_title, pixabay_link):
         params = {
             "alt_text": f"Bild von Pixabay: {pixabay_link}" if pixabay_link else "Bild von Pixabay"
         }
+        rate_limit.acquire("wp")
         response = requests.post(
             media_endpoint,
             headers=headers,
@@ -243,6 +245,7 @@ for feed_url in RSS_FEEDS:
             post_data["featured_media"] = media_id
 
         try:
+            rate_limit.acquire("wp")
             wp_response = requests.post(
                 f"{WP_URL}/wp-json/wp/v2/posts",
                 json=post_data,
@@ -252,8 +255,6 @@ for feed_url in RSS_FEEDS:
                 print(f"📝 Artikel veröffentlicht: {de_title} ({kategorie_name} / {focus_keyword})")
                 save_posted_title(title)
                 posted_titles.add(title)
-                print("⏳ Warte 60 Sekunden, bevor der nächste Post verarbeitet wird...")
-                time.sleep(60)
             else:
                 print(f"❌ WP-Fehler: {wp_response.status_code} – {wp_response.text}")
         except Exception as e:
@@ -0,0 +1,148 @@
+import json
+import re
+
+# Antwortformat laut prompt.txt:
+#   <deutscher Titel>
+#   <Fließtext, Absätze durch Leerzeilen getrennt>
+#   [Kategorie: <Name>]
+#   [Schlagwort: <Keyword>]
+MIN_LINES = 4
+DEFAULT_CATEGORY = "IT"
+# Längere "Titel" sind fast immer ein Zeichen dafür, dass das Format nicht stimmt
+TITLE_MAX_CHARS = 300
+TITLE_STRIP = " *\"'\n\r\t`#"
+REFUSALS = ("es tut mir leid", "leider kann ich", "i'm sorry", "i am sorry", "i can't help", "as an ai")
+
+_MARKER = re.compile(r"\[(Kategorie|Schlagwort):\s*(.*?)\]", re.IGNORECASE)
+
+
+class ParseError(Exception):
+    pass
+
+
+def _lines(text):
+    return [line for line in text.split("\n") if line.strip()]
+
+
+def clean_title(line):
+    return re.sub(r"^(titel|title)\s*:\s*", "", line.strip(TITLE_STRIP), flags=re.IGNORECASE).strip(TITLE_STRIP)
+
+
+def parse_reply(text):
+    # -> {"title", "body", "category", "keyword"}; ParseError bei unbrauchbarer Antwort
+    lines = _lines(text or "")
+    if len(lines) < MIN_LINES:
+        raise ParseError("GPT-Output zu kurz, wird übersprungen.")
+    rest = "\n".join(lines[1:]).strip()
+    markers = {}
+    for name, value in _MARKER.findall(rest):
+        markers.setdefault(name.lower(), value.strip())
+    body = _MARKER.sub("", rest).strip().strip(" *\"'\n\r\t[]")
+    return {
+        "title": clean_title(lines[0]),
+        "body": body,
+        "category": markers.get("kategorie") or DEFAULT_CATEGORY,
+        "keyword": markers.get("schlagwort", ""),
+    }
+
+
+def is_valid(text):
+    try:
+        parse_reply(text)
+    except ParseError:
+        return False
+    return True
+
+
+def json_schema(categories):
+    # response_format für den JSON-Modus (Structured Outputs)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "article",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "paragraphs": {"type": "array", "items": {"type": "string"}},
+                    "category": {"type": "string", "enum": list(categories)},
+                    "keyword": {"type": "string"},
+                },
+                "required": ["title", "paragraphs", "category", "keyword"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def parse_json(text):
+    # Gleiches Ergebnis wie parse_reply, aber aus der JSON-Antwort
+    try:
+        data = json.loads(text or "")
+    except ValueError as e:
+        raise ParseError(f"GPT-Antwort ist kein gültiges JSON: {e}")
+    if not isinstance(data, dict):
+        raise ParseError("GPT-Antwort ist kein JSON-Objekt.")
+    paragraphs = [p.strip() for p in data.get("paragraphs") or [] if isinstance(p, str) and p.strip()]
+    title = clean_title(str(data.get("title") or ""))
+    if not title or not paragraphs:
+        raise ParseError("GPT-Output zu kurz, wird übersprungen.")
+    return {
+        "title": title,
+        "body": "\n\n".join(paragraphs),
+        "category": str(data.get("category") or DEFAULT_CATEGORY).strip(),
+        "keyword": str(data.get("keyword") or "").strip(),
+    }
+
+
+def is_valid_json(text):
+    try:
+        parse_json(text)
+    except ParseError:
+        return False
+    return True
+
+
+class StreamParser:
+    # Liest eine gestreamte Antwort Stück für Stück mit (Titel in .title).
+    # Offensichtlich kaputte Antworten lösen sofort einen ParseError aus, damit
+    # der Aufrufer den Stream abbrechen kann, statt auf das Ende zu warten.
+    def __init__(self):
+        self.text = ""
+        self.title = None
+        self._checked = 0
+        self._lines_seen = 0
+
+    def feed(self, delta):
+        self.text += delta
+        if self.title is None:
+            self._check_title()
+        # Nur vollständige Zeilen prüfen
+        end = self.text.rfind("\n")
+        if end >= self._checked:
+            for line in self.text[self._checked:end].split("\n"):
+                self._check_line(line)
+            self._checked = end + 1
+
+    def _check_title(self):
+        stripped = self.text.lstrip()
+        if any(stripped.lower().startswith(r) for r in REFUSALS):
+            raise ParseError(f"GPT verweigert die Antwort: {stripped[:80]!r}")
+        if "\n" not in stripped:
+            if len(stripped) > TITLE_MAX_CHARS:
+                raise ParseError("Erste Zeile ist kein Titel (zu lang).")
+            return
+        for line in stripped.split("\n")[:-1]:
+            title = clean_title(line)
+            if title:
+                self.title = title
+                return
+
+    def _check_line(self, line):
+        for name, _ in _MARKER.findall(line):
+            # Wie parse_reply: vor den Markern müssen Titel und mindestens eine Textzeile stehen
+            if name.lower() == "kategorie" and self._lines_seen < MIN_LINES - 2:
+                raise ParseError("Kategorie vor dem Text, GPT-Output zu kurz.")
+        if line.strip():
+            self._lines_seen += 1
@@ -0,0 +1,110 @@
+import json
+import logging
+import time
+
+import llm
+from article_parser import json_schema
+from config import KAT_IDS, OPENAI_BATCH_POLL_SECONDS, OPENAI_BATCH_TIMEOUT, OPENAI_MAX_TOKENS, OPENAI_MODEL
+from llm_cache import cache_key
+
+FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_input(prompts, model=OPENAI_MODEL, temperature=0.7, max_tokens=OPENAI_MAX_TOKENS, json_mode=False):
+    # prompts: {custom_id: prompt_txt} -> JSONL für die Batch-API
+    lines = []
+    for custom_id, prompt_txt in prompts.items():
+        body = {
+            "model": model,
+            "messages": llm.build_messages(prompt_txt, json_mode),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if json_mode:
+            body["response_format"] = json_schema(KAT_IDS)
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        }, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+def parse_batch_output(text, model=OPENAI_MODEL):
+    # -> {custom_id: Antworttext}; fehlerhafte Zeilen werden geloggt und ausgelassen.
+    # Verbrauch zählt unter dem angefragten Modell (wie bei llm.generate), nicht unter
+    # dem Namen aus der Antwort (z.B. "gpt-4o-2024-08-06"), und zum Batch-Preis.
+    replies = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        custom_id = row.get("custom_id")
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code") != 200:
+            logging.warning(f"Batch-Antwort fehlerhaft für {custom_id}: {row.get('error') or response.get('status_code')}")
+            continue
+        try:
+            body = response["body"]
+            replies[custom_id] = body["choices"][0]["message"]["content"].strip()
+            llm.record_usage(model, body.get("usage"), log=False, batch=True)
+        except (KeyError, IndexError, TypeError):
+            logging.warning(f"Batch-Antwort ohne Inhalt für {custom_id}")
+    return replies
+
+
+def wait_for_batch(batch_id, poll_seconds=OPENAI_BATCH_POLL_SECONDS, timeout=OPENAI_BATCH_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        batch = llm.get_client().batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        if counts is not None:
+            logging.info(f"Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} fertig)")
+        else:
+            logging.info(f"Batch {batch_id}: {batch.status}")
+        if batch.status in FINAL_STATES:
+            return batch
+        if time.monotonic() > deadline:
+            logging.warning(f"Batch {batch_id} nicht rechtzeitig fertig, breche Warten ab.")
+            return batch
+        time.sleep(poll_seconds)
+
+
+def run_batch(prompts, model=OPENAI_MODEL, temperature=0.7, max_tokens=OPENAI_MAX_TOKENS, validate=None,
+              poll_seconds=OPENAI_BATCH_POLL_SECONDS, timeout=OPENAI_BATCH_TIMEOUT, json_mode=False, metas=None):
+    # Schickt alle noch nicht gecachten Prompts als einen Batch und legt die
+    # Antworten im LLM-Cache ab. Die normale Pipeline holt sie dann dort ab.
+    # Die Batch-API erlaubt nur ein Modell pro Batch. metas: custom_id -> Eintragsdaten.
+    keys = {
+        custom_id: cache_key(model, llm.build_messages(prompt_txt, json_mode), temperature)
+        for custom_id, prompt_txt in prompts.items()
+    }
+    pending = {cid: p for cid, p in prompts.items() if llm.get_cache().get(keys[cid]) is None}
+    if not pending:
+        logging.info("Batch: alle Antworten schon im Cache.")
+        return 0
+    payload = build_batch_input(pending, model, temperature, max_tokens, json_mode)
+    input_file = llm.get_client().files.create(
+        file=("newsbot_batch.jsonl", payload.encode("utf-8")), purpose="batch"
+    )
+    batch = llm.get_client().batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logging.info(f"Batch {batch.id} gestartet: {len(pending)} Anfragen.")
+    batch = wait_for_batch(batch.id, poll_seconds, timeout)
+    if batch.status != "completed" or not batch.output_file_id:
+        logging.error(f"Batch {batch.id} ohne Ergebnis beendet: {batch.status}")
+        return 0
+    replies = parse_batch_output(llm.get_client().files.content(batch.output_file_id).text, model)
+    stored = 0
+    for custom_id, reply in replies.items():
+        if custom_id not in keys:
+            continue
+        if validate is None or validate(reply):
+            llm.get_cache().put(keys[custom_id], model, reply, (metas or {}).get(custom_id))
+            stored += 1
+    logging.info(f"Batch {batch.id}: {stored}/{len(pending)} Antworten übernommen.")
+    return stored
@@ -0,0 +1,177 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_server import feed_list, start_stub_server
+
+# Offline-Benchmark: startet den Stub (OpenAI, Feeds, Pixabay, WordPress) und
+# lässt main.py für jede Kombination aus Feed-Anzahl und --max einmal komplett
+# mit frischem Zustand durchlaufen.
+#   python bench.py --feeds 5,20 --max 2,5 --chat-latency 0.5
+# Startzeit: misst, wie lange "import main" dauert, und scheitert über dem Budget.
+#   python bench.py --import-time --import-budget-ms 150
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _ints(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def run_once(base_url, feeds, max_entries, extra_args=(), env_overrides=None):
+    workdir = tempfile.mkdtemp(prefix="newsbot-bench-")
+    feeds_file = os.path.join(workdir, "rss_feeds.txt")
+    with open(feeds_file, "w", encoding="utf-8") as f:
+        f.write(feed_list(base_url, feeds))
+    report_file = os.path.join(workdir, "run_report.json")
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=f"{base_url}/v1",
+        WP_URL=base_url,
+        WP_USER="stub",
+        WP_APP_PASSWORD="stub",
+        PIXABAY_API_KEY="stub",
+        PIXABAY_URL=f"{base_url}/pixabay/api/",
+        RSS_FEEDS_FILE=feeds_file,
+        DB_PATH=os.path.join(workdir, "newsbot.db"),
+        FEED_STATE_FILE=os.path.join(workdir, "feed_state.json"),
+        METRICS_REPORT_FILE=report_file,
+        METRICS_PROM_FILE="",
+    )
+    env.update(env_overrides or {})
+    cmd = [sys.executable, os.path.join(HERE, "main.py"), "run", f"--max={max_entries}", *extra_args]
+    start = time.monotonic()
+    with open(os.path.join(workdir, "output.log"), "w") as out:
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=out, stderr=subprocess.STDOUT)
+        # wait4 liefert die Ressourcen genau dieses Kindprozesses (ru_maxrss in KB unter Linux)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.monotonic() - start
+    report = {}
+    if os.path.exists(report_file):
+        with open(report_file, encoding="utf-8") as f:
+            report = json.load(f)
+    entry = report.get("histograms", {}).get("entry_seconds", {}).get("-", {})
+    last_run = report.get("last_run", {})
+    published = last_run.get("success", 0)
+    return {
+        "feeds": feeds,
+        "max": max_entries,
+        "exit_code": proc.returncode,
+        "published": published,
+        "errors": last_run.get("errors"),
+        "wall_seconds": round(wall, 3),
+        "entries_per_second": round(published / wall, 3) if wall else None,
+        "p50": entry.get("p50"),
+        "p99": entry.get("p99"),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "workdir": workdir,
+    }
+
+
+def import_time(module="main", runs=5):
+    # Kumulierte Importzeit laut "python -X importtime" (Median über mehrere Starts)
+    # plus die Module mit dem größten Eigenanteil. Läuft in einem leeren Verzeichnis,
+    # damit auffällt, falls der Import schon Dateien anlegt.
+    totals, self_times = [], {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="newsbot-import-") as workdir:
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=workdir, env=dict(os.environ, PYTHONPATH=HERE), capture_output=True, text=True,
+            )
+            created = os.listdir(workdir)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} fehlgeschlagen:\n{proc.stderr[-2000:]}")
+        block = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            entry = (name.strip(), int(self_us), int(cumulative_us))
+            block.append(entry)
+            # Oberste Ebene (ohne Einrückung): nur der Baum unter dem Modul zählt
+            if not name[1:].startswith(" "):
+                if entry[0] == module:
+                    break
+                block = []
+        totals.append(block[-1][2] / 1000)
+        for name, self_us, _ in block:
+            self_times.setdefault(name, []).append(self_us / 1000)
+    slowest = sorted(((sorted(v)[len(v) // 2], k) for k, v in self_times.items()), reverse=True)[:8]
+    return {
+        "module": module,
+        "median_ms": round(sorted(totals)[len(totals) // 2], 1),
+        "max_ms": round(max(totals), 1),
+        "slowest": [(name, round(ms, 1)) for ms, name in slowest],
+        "created_files": created,
+    }
+
+
+def _fmt(value, digits=2):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_table(results):
+    print(f"{'Feeds':>5} {'max':>4} {'Posts':>5} {'Fehler':>6} {'Zeit s':>7} {'Posts/s':>8} "
+          f"{'p50 s':>6} {'p99 s':>6} {'RSS MB':>7}")
+    for r in results:
+        print(f"{r['feeds']:>5} {r['max']:>4} {r['published']:>5} {r['errors'] or 0:>6} "
+              f"{_fmt(r['wall_seconds'], 1):>7} {_fmt(r['entries_per_second']):>8} "
+              f"{_fmt(r['p50']):>6} {_fmt(r['p99']):>6} {_fmt(r['peak_rss_mb'], 1):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durchsatz-Benchmark gegen lokale Stubs")
+    parser.add_argument('--feeds', type=_ints, default=[5, 20], help='Feed-Anzahlen, kommagetrennt')
+    parser.add_argument('--max', type=_ints, default=[2, 5], help='Werte für --max, kommagetrennt')
+    parser.add_argument('--entries', type=int, default=10, help='Einträge pro synthetischem Feed')
+    parser.add_argument('--chat-latency', type=float, default=0.5, help='Latenz pro Chat-Completion (s)')
+    parser.add_argument('--wp-latency', type=float, default=0.05, help='Latenz pro WordPress-Schreibzugriff (s)')
+    parser.add_argument('--pixabay-latency', type=float, default=0.05, help='Latenz pro Pixabay-Suche (s)')
+    parser.add_argument('--wp-writes-per-minute', default="0",
+                        help='WP-Taktung im Benchmark (Standard 0 = ungebremst, misst nur den Bot)')
+    parser.add_argument('--sequential', action='store_true', help='main.py mit --sequential starten')
+    parser.add_argument('--json', help='Ergebnisse zusätzlich als JSON speichern')
+    parser.add_argument('--import-time', action='store_true', help='Nur die Importzeit von main.py messen')
+    parser.add_argument('--import-budget-ms', type=float, default=150, help='Budget für "import main" (ms)')
+    parser.add_argument('--import-runs', type=int, default=5, help='Wie viele Starts für den Median')
+    args = parser.parse_args()
+
+    if args.import_time:
+        result = import_time(runs=args.import_runs)
+        print(f"import main: Median {result['median_ms']} ms, max {result['max_ms']} ms "
+              f"(Budget {args.import_budget_ms:g} ms)")
+        for name, ms in result["slowest"]:
+            print(f"  {ms:>7.1f} ms  {name}")
+        if result["created_files"]:
+            print(f"Achtung: der Import legt Dateien an: {', '.join(result['created_files'])}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+        sys.exit(0 if result["median_ms"] <= args.import_budget_ms and not result["created_files"] else 1)
+
+    server, base_url = start_stub_server(
+        chat_latency=args.chat_latency, wp_latency=args.wp_latency,
+        pixabay_latency=args.pixabay_latency, feeds=max(args.feeds), entries_per_feed=args.entries,
+    )
+    extra_args = ["--sequential"] if args.sequential else []
+    results = []
+    for feeds, max_entries in itertools.product(args.feeds, args.max):
+        result = run_once(base_url, feeds, max_entries, extra_args,
+                          {"WP_WRITES_PER_MINUTE": args.wp_writes_per_minute})
+        results.append(result)
+        print(f"Feeds={feeds} --max={max_entries}: {result['published']} Posts in {result['wall_seconds']}s "
+              f"[{result['workdir']}]", flush=True)
+    server.shutdown()
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
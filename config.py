@@ -5,12 +5,118 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_ORG = os.getenv("OPENAI_ORG")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # z.B. für lokale Stubs
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+# Maximale Antwortlänge in Tokens (Generierung, Batch und Token-Budget)
+OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "1500"))
+# Antworten streamen: Titel/Kategorie stehen früher fest, kaputte Antworten werden abgebrochen
+OPENAI_STREAM = os.getenv("OPENAI_STREAM", "1").lower() not in ("0", "false", "no")
+# Antwortformat: "text" (Titel/Text/[Kategorie:]/[Schlagwort:]) oder "json" (Structured Outputs)
+OPENAI_OUTPUT_MODE = os.getenv("OPENAI_OUTPUT_MODE", "text").lower()
+# Modell-Router: kurze (< ROUTER_SHORT_CHARS Zeichen) oder wenig relevante Einträge
+# (Score < ROUTER_MIN_SCORE) gehen an OPENAI_SMALL_MODEL (leer = immer OPENAI_MODEL)
+OPENAI_SMALL_MODEL = os.getenv("OPENAI_SMALL_MODEL", "")
+ROUTER_SHORT_CHARS = int(os.getenv("ROUTER_SHORT_CHARS", "600"))
+ROUTER_MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "0"))
+# Preise in USD pro 1 Mio. Tokens (Input/Output) für die Kostenabrechnung pro Lauf
+OPENAI_PRICES = os.getenv("OPENAI_PRICES", "gpt-4o=2.5/10,gpt-4o-mini=0.15/0.6,gpt-4.1=2/8,gpt-4.1-mini=0.4/1.6")
 WP_URL = os.getenv("WP_URL")
 WP_USER = os.getenv("WP_USER")
 WP_APP_PASSWORD = os.getenv("WP_APP_PASSWORD")
+# Mehrere WordPress-Ziele (JSON-Liste mit name/url/user/app_password/categories/db, siehe
+# sites.py). Fehlt die Datei, ist WP_URL/WP_USER/WP_APP_PASSWORD mit KAT_IDS das einzige Ziel.
+WP_SITES_FILE = os.getenv("WP_SITES_FILE", "wp_sites.json")
 PIXABAY_API_KEY = os.getenv("PIXABAY_API_KEY")
+PIXABAY_URL = os.getenv("PIXABAY_URL", "https://pixabay.com/api/")
 UNSPLASH_ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY", "")  # Falls du Unsplash nutzen willst
 
+RSS_FEEDS_FILE = os.getenv("RSS_FEEDS_FILE", "rss_feeds.txt")
+
+# Feed-Abruf: wie viele Feeds gleichzeitig, wo ETag/Last-Modified gespeichert werden
+FEED_CONCURRENCY = int(os.getenv("FEED_CONCURRENCY", "10"))
+FEED_STATE_FILE = os.getenv("FEED_STATE_FILE", "feed_state.json")
+FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", "20"))
+
+# HTTP-Client: Verbindungen pro Host, Wiederholungen bei 429/5xx mit Backoff (Sekunden)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "1"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+
+# Wie lange Pixabay-Suchergebnisse gecacht werden (Stunden)
+PIXABAY_CACHE_TTL_HOURS = float(os.getenv("PIXABAY_CACHE_TTL_HOURS", "24"))
+
+# Wie lange die lokale Kopie der WordPress-Tags gilt, bevor sie neu geladen wird (Stunden)
+TAG_CACHE_TTL_HOURS = float(os.getenv("TAG_CACHE_TTL_HOURS", "24"))
+
+# Bilder: max. Breite (0 = nicht verkleinern), Zielformat ("webp"/"jpeg", leer = wie Original),
+# Qualität und ab welcher Größe der Download-Puffer auf die Platte ausweicht.
+# Neu kodiert wird nur beim Verkleinern oder mit IMAGE_FORMAT, sonst geht das Original hoch.
+IMAGE_MAX_WIDTH = int(os.getenv("IMAGE_MAX_WIDTH", "1600"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "82"))
+IMAGE_SPOOL_BYTES = int(os.getenv("IMAGE_SPOOL_BYTES", str(1024 * 1024)))
+
+# Daemon-Modus: Grenzen für das Abrufintervall pro Feed (Sekunden), Startwert für neue
+# Feeds und wie lange der Daemon höchstens am Stück schläft
+SCHEDULER_MIN_INTERVAL = int(os.getenv("SCHEDULER_MIN_INTERVAL", "300"))
+SCHEDULER_MAX_INTERVAL = int(os.getenv("SCHEDULER_MAX_INTERVAL", str(6 * 3600)))
+SCHEDULER_DEFAULT_INTERVAL = int(os.getenv("SCHEDULER_DEFAULT_INTERVAL", "3600"))
+DAEMON_MAX_SLEEP = int(os.getenv("DAEMON_MAX_SLEEP", "60"))
+
+# Metriken: JSON-Report pro Lauf, Prometheus-Textdatei (z.B. für den
+# Node-Exporter) und im Daemon-Modus ein HTTP-Endpoint /metrics (Port, 0 = aus)
+METRICS_REPORT_FILE = os.getenv("METRICS_REPORT_FILE", "run_report.json")
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Lokale Zustandsdatenbank (SQLite) und wie lange Dedup-Einträge gehalten werden (0 = für immer)
+DB_PATH = os.getenv("DB_PATH", "newsbot.db")
+DEDUP_TTL_DAYS = int(os.getenv("DEDUP_TTL_DAYS", "0"))
+# Ähnliche Meldungen (SimHash): max. abweichende Bits von 64, -1 = aus
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+
+# Cache für GPT-Antworten (Retry/Replay ohne neue Generierung)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_AGE_DAYS = int(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+# Batch-Modus (--batch): Abfrageintervall und max. Wartezeit in Sekunden
+OPENAI_BATCH_POLL_SECONDS = int(os.getenv("OPENAI_BATCH_POLL_SECONDS", "30"))
+OPENAI_BATCH_TIMEOUT = int(os.getenv("OPENAI_BATCH_TIMEOUT", str(24 * 3600)))
+
+# Job-Queue: max. Fehlversuche pro Eintrag, nach wie vielen Sekunden die Sperre
+# eines (abgestürzten) Prozesses verfällt, wie lange fertige Jobs aufgehoben werden
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", "3600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "30"))
+
+# Pipeline-Modus: Worker pro Stufe und Queue-Größe zwischen den Stufen
+PIPELINE_GENERATE_WORKERS = int(os.getenv("PIPELINE_GENERATE_WORKERS", "4"))
+PIPELINE_IMAGE_WORKERS = int(os.getenv("PIPELINE_IMAGE_WORKERS", "2"))
+PIPELINE_PUBLISH_WORKERS = int(os.getenv("PIPELINE_PUBLISH_WORKERS", "1"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+
+# Prompt: Vorlage (feste Anweisungen + Platzhalter {original_title}/{text}) und
+# max. Tokens für den Feed-Text pro Eintrag (0 = nicht kürzen)
+PROMPT_FILE = os.getenv("PROMPT_FILE", "prompt.txt")
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "1200"))
+
+# Relevanz vor der Generierung: Halbwertszeit der Aktualität, max. Alter (0 = egal),
+# Schlagwörter mit Gewicht ("KI=2,Apple=1.5") und Budget pro Lauf (0 = unbegrenzt)
+RELEVANCE_HALF_LIFE_HOURS = float(os.getenv("RELEVANCE_HALF_LIFE_HOURS", "12"))
+RELEVANCE_MAX_AGE_HOURS = float(os.getenv("RELEVANCE_MAX_AGE_HOURS", "72"))
+RELEVANCE_KEYWORDS = os.getenv("RELEVANCE_KEYWORDS", "")
+RUN_MAX_ENTRIES = int(os.getenv("RUN_MAX_ENTRIES", "0"))
+RUN_MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "0"))
+
+# Token-Bucket pro Dienst statt fester Pausen (Aufrufe pro Minute, 0 = ungebremst)
+WP_WRITES_PER_MINUTE = float(os.getenv("WP_WRITES_PER_MINUTE", "12"))
+WP_WRITE_BURST = float(os.getenv("WP_WRITE_BURST", "2"))
+PIXABAY_REQUESTS_PER_MINUTE = float(os.getenv("PIXABAY_REQUESTS_PER_MINUTE", "80"))
+# 0 = kein festes Limit; die tatsächlichen Grenzen liefert OpenAI per Header
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))
+
 KAT_IDS = {
     "Gaming": 2,
     "IT": 3,
@@ -0,0 +1,109 @@
+import logging
+import os
+import time
+
+from config import DB_PATH, DEDUP_TTL_DAYS
+from storage import get_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    posted_at INTEGER NOT NULL,
+    PRIMARY KEY (kind, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS posted_age ON posted (posted_at);
+"""
+
+KINDS = ("title", "hash", "link")
+
+
+class DedupStore:
+    # Schon veröffentlichte Titel/Inhalts-Hashes/Links, indiziert in SQLite.
+    # Nachschlagen geht über den Primärschlüssel, nichts wird komplett geladen.
+    def __init__(self, path=DB_PATH, db=None):
+        self.db = db or get_db(path)
+        self.db.executescript(SCHEMA)
+
+    def contains(self, kind, value):
+        if not value:
+            return False
+        rows = self.db.execute(
+            "SELECT 1 FROM posted WHERE kind = ? AND value = ? LIMIT 1", (kind, value)
+        )
+        return bool(rows)
+
+    def has_title(self, title):
+        return self.contains("title", title)
+
+    def has_hash(self, content_hash):
+        return self.contains("hash", content_hash)
+
+    def has_link(self, link):
+        return self.contains("link", link)
+
+    def mark_posted(self, title=None, content_hash=None, link=None, posted_at=None):
+        posted_at = int(posted_at or time.time())
+        values = zip(KINDS, (title, content_hash, link))
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO posted (kind, value, posted_at) VALUES (?, ?, ?)",
+                [(kind, value, posted_at) for kind, value in values if value],
+            )
+
+    def prune(self, max_age_days=DEDUP_TTL_DAYS):
+        if not max_age_days or max_age_days <= 0:
+            return 0
+        cutoff = int(time.time() - max_age_days * 86400)
+        with self.db.transaction() as conn:
+            removed = conn.execute("DELETE FROM posted WHERE posted_at < ?", (cutoff,)).rowcount
+        if removed:
+            logging.info(f"Dedup: {removed} Einträge älter als {max_age_days} Tage entfernt.")
+        return removed
+
+    def count(self):
+        rows = self.db.execute("SELECT kind, COUNT(*) FROM posted GROUP BY kind")
+        return {kind: n for kind, n in rows}
+
+    def import_text_file(self, filename, kind, batch_size=5000):
+        # Alte posted_*.txt zeilenweise übernehmen, ohne sie komplett einzulesen
+        if not os.path.exists(filename):
+            return 0
+        posted_at = int(os.path.getmtime(filename))
+        imported = 0
+        batch = []
+        with open(filename, "r", encoding="utf-8") as f:
+            for line in f:
+                value = line.strip()
+                if not value:
+                    continue
+                batch.append((kind, value, posted_at))
+                if len(batch) >= batch_size:
+                    imported += self._insert_batch(batch)
+                    batch = []
+        if batch:
+            imported += self._insert_batch(batch)
+        return imported
+
+    def _insert_batch(self, batch):
+        with self.db.transaction() as conn:
+            return conn.executemany(
+                "INSERT OR IGNORE INTO posted (kind, value, posted_at) VALUES (?, ?, ?)", batch
+            ).rowcount
+
+    def import_legacy_files(self, titles_file="posted_titles.txt", hashes_file="posted_hashes.txt"):
+        # Einmaliger Import; danach merkt sich die DB, dass er gelaufen ist
+        if self.db.get_meta("legacy_import_done"):
+            return 0
+        imported = self.import_text_file(titles_file, "title")
+        imported += self.import_text_file(hashes_file, "hash")
+        self.db.set_meta("legacy_import_done", int(time.time()))
+        if imported:
+            logging.info(f"Dedup: {imported} Einträge aus {titles_file}/{hashes_file} importiert.")
+        return imported
+
+
+def open_dedup_store(path=DB_PATH):
+    store = DedupStore(path)
+    store.import_legacy_files()
+    return store
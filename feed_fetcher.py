@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+import metrics
+from config import FEED_CONCURRENCY, FEED_STATE_FILE
+
+FEED_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; newsbot)",
+    "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.1",
+}
+
+_state_lock = threading.Lock()
+
+
+def load_feed_state(filename=FEED_STATE_FILE):
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Feed-Status '{filename}' nicht lesbar, starte leer: {e}")
+        return {}
+
+
+def save_feed_state(state, filename=FEED_STATE_FILE):
+    # Erst in eine Temp-Datei schreiben, dann atomar ersetzen
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{filename}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def _received_bytes(response):
+    # Über die Leitung gelesene Bytes laut urllib3; bei chunked Antworten zählt urllib3
+    # nicht mit, dann die Länge des (entpackten) Inhalts statt des Content-Length-Headers
+    try:
+        wire = int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        wire = 0
+    return wire or len(response.content)
+
+
+def fetch_feed(feed_url, state):
+    # Bedingter GET über http_client (Timeout pro Endpunkt, Keep-Alive, Wiederholungen):
+    # ETag/Last-Modified vom letzten Lauf mitschicken, feedparser bekommt nur den Inhalt
+    import feedparser
+
+    cached = state.get(feed_url, {})
+    headers = dict(FEED_HEADERS)
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("modified"):
+        headers["If-Modified-Since"] = cached["modified"]
+    start = time.monotonic()
+    stats = {"url": feed_url, "status": None, "bytes": 0, "entries": 0, "not_modified": False, "error": None}
+    feed = feedparser.FeedParserDict(entries=[], bozo=False)
+    try:
+        response = http_client.get(feed_url, endpoint="feed", headers=headers)
+    except Exception as e:
+        stats["error"] = str(e)
+    else:
+        status = stats["status"] = response.status_code
+        stats["bytes"] = _received_bytes(response)
+        if status == 304:
+            stats["not_modified"] = True
+        elif status >= 400:
+            stats["error"] = f"HTTP {status}"
+        else:
+            feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+            if feed.bozo and not feed.entries:
+                stats["error"] = str(feed.get("bozo_exception"))
+    stats["latency"] = round(time.monotonic() - start, 3)
+    stats["entries"] = len(feed.entries)
+    # Neuer Status wird erst mit commit_feed_state gespeichert, wenn die Einträge in der Queue sind
+    new_state = dict(cached)
+    if stats["status"] and stats["status"] < 300:
+        for key, header in (("etag", "ETag"), ("modified", "Last-Modified")):
+            value = response.headers.get(header)
+            if value:
+                new_state[key] = value
+            else:
+                new_state.pop(key, None)
+    new_state["last_status"] = stats["status"]
+    new_state["last_fetch"] = int(time.time())
+    stats["state"] = new_state
+    return feed, stats
+
+
+def fetch_feeds(feed_urls, max_workers=FEED_CONCURRENCY, state_file=FEED_STATE_FILE):
+    # Holt alle Feeds parallel; Reihenfolge der Ergebnisse = Reihenfolge der URLs.
+    # state_file=None: ohne bedingten GET (Prüfen, Probelauf). Gespeichert wird hier nichts.
+    state = load_feed_state(state_file) if state_file else {}
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(fetch_feed, url, state) for url in feed_urls]
+        for url, future in zip(feed_urls, futures):
+            try:
+                feed, stats = future.result()
+            except Exception as e:
+                logging.warning(f"Feed-Abruf fehlgeschlagen: {url} ({e})")
+                continue
+            metrics.observe("feed_fetch_seconds", stats["latency"])
+            metrics.inc("feed_bytes", stats["bytes"])
+            if stats["error"]:
+                metrics.inc("feeds", result="error")
+                logging.warning(f"Feed fehlerhaft: {url} ({stats['error']})")
+            elif stats["not_modified"]:
+                metrics.inc("feeds", result="not_modified")
+                logging.info(f"Feed unverändert (304): {url} [{stats['latency']}s]")
+            else:
+                metrics.inc("feeds", result="ok")
+                metrics.inc("feed_entries", stats["entries"])
+                logging.info(
+                    f"Feed geladen: {url} [{stats['latency']}s, {stats['bytes']} Bytes, "
+                    f"{stats['entries']} Einträge]"
+                )
+            results.append((url, feed, stats))
+    return results
+
+
+def commit_feed_state(results, skip=(), state_file=FEED_STATE_FILE):
+    # ETag/Last-Modified erst speichern, wenn alle Einträge eines Feeds verarbeitet sind.
+    # Feeds in skip (z.B. Einträge wegen des Budgets zurückgestellt) behalten den alten
+    # Stand, damit der nächste Lauf sie wieder komplett liest statt 304 zu bekommen.
+    with _state_lock:
+        state = load_feed_state(state_file)
+        for url, _, stats in results:
+            if url not in skip and "state" in stats:
+                state[url] = stats["state"]
+        save_feed_state(state, state_file)
+
+
+def log_fetch_summary(results):
+    if not results:
+        return
+    total_bytes = sum(s["bytes"] for _, _, s in results)
+    not_modified = sum(1 for _, _, s in results if s["not_modified"])
+    slowest = max(results, key=lambda r: r[2]["latency"])
+    logging.info(
+        f"Feeds: {len(results)} abgerufen, {not_modified} unverändert (304), "
+        f"{total_bytes} Bytes, langsamster: {slowest[0]} ({slowest[2]['latency']}s)"
+    )
@@ -0,0 +1,158 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import rate_limit
+from config import FEED_TIMEOUT, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_MAX_RETRIES, HTTP_POOL_SIZE
+
+# (Connect-, Read-Timeout) pro Endpunkt-Typ
+TIMEOUTS = {
+    "default": (5, 20),
+    "feed": (5, FEED_TIMEOUT),
+    "pixabay": (5, 10),
+    "image": (5, 30),
+    "wp": (5, 20),
+    "wp_posts": (5, 20),
+    "wp_media": (5, 60),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Bei nicht-idempotenten Aufrufen (z.B. Beitrag anlegen) nur wiederholen, wenn
+# der Server sicher nichts verarbeitet hat
+SAFE_RETRY_STATUSES = {429, 503}
+
+# Endpunkt -> Token-Bucket. Bei WordPress zählen nur schreibende Aufrufe.
+RATE_LIMITED = {"pixabay": "pixabay", "wp": "wp", "wp_posts": "wp", "wp_media": "wp"}
+
+_sessions = {}
+_lock = threading.Lock()
+_counters = {"requests": 0, "retries": 0, "errors": 0}
+
+
+def _count(name, n=1):
+    with _lock:
+        _counters[name] += n
+
+
+def session_for(url):
+    # Eine Session (= Connection-Pool mit Keep-Alive) pro Host
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    # Exponentiell mit vollem Jitter; Retry-After vom Server ist die Untergrenze
+    delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def request(method, url, endpoint="default", retries=HTTP_MAX_RETRIES, idempotent=None, rate_key=None, **kwargs):
+    # requests erst beim ersten Aufruf laden (schneller Start für Befehle ohne Netzwerk)
+    import requests
+
+    if idempotent is None:
+        idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+    statuses = RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES
+    kwargs.setdefault("timeout", TIMEOUTS.get(endpoint, TIMEOUTS["default"]))
+    session = session_for(url)
+    data = kwargs.get("data")
+    service = RATE_LIMITED.get(endpoint)
+    if service == "wp":
+        # rate_key: eigener Bucket pro WordPress-Ziel (z.B. "wp:<Seite>")
+        service = None if method.upper() == "GET" else rate_key or service
+    attempt = 0
+    while True:
+        if service:
+            rate_limit.acquire(service)
+        _count("requests")
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # Nicht-idempotente Aufrufe nur wiederholen, wenn die Verbindung gar
+            # nicht erst zustande kam – sonst könnte der Request schon angekommen sein
+            retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+            if attempt >= retries or not retryable:
+                _count("errors")
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"HTTP-Fehler bei {endpoint} ({e}), neuer Versuch in {delay:.1f}s")
+        else:
+            if service:
+                rate_limit.observe_headers(service, response.headers)
+                if response.status_code == 429:
+                    rate_limit.pause(service, _retry_after(response))
+            if response.status_code not in statuses or attempt >= retries:
+                return response
+            retry_after = _retry_after(response)
+            if retry_after is not None and retry_after > HTTP_BACKOFF_MAX * 4:
+                return response
+            delay = backoff_delay(attempt, retry_after)
+            logging.warning(
+                f"HTTP {response.status_code} bei {endpoint}, neuer Versuch in {delay:.1f}s"
+            )
+            response.close()
+        attempt += 1
+        _count("retries")
+        # Datei-Objekte (Streaming-Uploads) für den nächsten Versuch zurückspulen
+        if hasattr(data, "seek"):
+            data.seek(0)
+        time.sleep(delay)
+
+
+def get(url, endpoint="default", **kwargs):
+    return request("GET", url, endpoint=endpoint, **kwargs)
+
+
+def post(url, endpoint="default", **kwargs):
+    return request("POST", url, endpoint=endpoint, **kwargs)
+
+
+def stats():
+    # Wiederverwendete Verbindungen = Requests über den Pool minus neu aufgebaute Verbindungen
+    connections = reused = 0
+    with _lock:
+        result = dict(_counters)
+        sessions = list(_sessions.values())
+    for session in sessions:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                reused += max(0, pool.num_requests - pool.num_connections)
+    result["connections"] = connections
+    result["reused_connections"] = reused
+    return result
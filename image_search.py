@@ -1,30 +1,131 @@
-import requests
+import json
 import random
 import logging
-from config import PIXABAY_API_KEY
+import re
+import threading
+import time
+from config import DB_PATH, PIXABAY_API_KEY, PIXABAY_CACHE_TTL_HOURS, PIXABAY_URL
+from storage import get_db
+import http_client
 
-def optimize_keywords(keyword, category, title, retries=3):
-    # Kombiniere Keyword, Kategorie und ggf. den Titel für eine bessere Suche
-    base_queries = [keyword, category, title]
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pixabay_cache (
+    query TEXT PRIMARY KEY,
+    hits TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL
+);
+"""
+
+# Nur die Felder, die wir später brauchen, landen im Cache
+HIT_FIELDS = ("id", "largeImageURL", "pageURL", "webformatURL", "tags")
+
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+_memory = {}
+_db = None
+_lock = threading.Lock()
+_query_locks = {}
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def normalize_query(q):
+    q = (q or "").lower().translate(_UMLAUTS)
+    return re.sub(r"\s+", " ", q).strip()
+
+
+def optimize_keywords(keyword, category, title):
+    # Feste Reihenfolge vom genauesten zum allgemeinsten Suchbegriff, damit
+    # gleiche Artikel-Daten immer dieselben (gecachten) Queries ergeben
+    candidates = [
+        f"{keyword} {category}",
+        f"{title} {category}",
+        keyword,
+        category,
+        keyword or category or "Technologie",
+    ]
     tried = set()
-    for _ in range(retries):
-        # Query-Variante bauen
-        q = " ".join(filter(None, [random.choice(base_queries), category]))
-        q = q.strip()
+    for q in candidates:
+        q = normalize_query(q)
         if q and q not in tried:
             tried.add(q)
             yield q
-    # Fallback
-    yield keyword or category or "Technologie"
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def _cache_db():
+    global _db
+    if _db is None:
+        db = get_db(DB_PATH)
+        db.executescript(SCHEMA)
+        _db = db
+    return _db
+
+
+def _fetch_hits(q):
+    params = {
+        "key": PIXABAY_API_KEY, "q": q, "image_type": "photo",
+        "lang": "de", "per_page": 20, "safesearch": "true",
+    }
+    resp = http_client.get(PIXABAY_URL, endpoint="pixabay", params=params)
+    resp.raise_for_status()
+    hits = resp.json().get("hits", [])
+    return [{field: hit.get(field) for field in HIT_FIELDS} for hit in hits]
+
+
+def _query_lock(q):
+    with _lock:
+        return _query_locks.setdefault(q, threading.Lock())
+
+
+def _memory_hit(q):
+    with _lock:
+        cached = _memory.get(q)
+    if cached is not None:
+        _count("memory_hits")
+    return cached
+
+
+def search_hits(q):
+    # Zwei Cache-Ebenen: pro Lauf im Speicher, dazu SQLite mit TTL über Läufe hinweg
+    cached = _memory_hit(q)
+    if cached is not None:
+        return cached
+    # Pro Query fragt nur ein Thread nach; die anderen warten und lesen dann den Cache
+    with _query_lock(q):
+        cached = _memory_hit(q)
+        if cached is not None:
+            return cached
+        now = time.time()
+        db = _cache_db()
+        rows = db.execute("SELECT hits, fetched_at FROM pixabay_cache WHERE query = ?", (q,))
+        if rows and now - rows[0][1] < PIXABAY_CACHE_TTL_HOURS * 3600:
+            hits = json.loads(rows[0][0])
+            _count("db_hits")
+        else:
+            _count("misses")
+            hits = _fetch_hits(q)
+            db.execute(
+                "INSERT OR REPLACE INTO pixabay_cache (query, hits, fetched_at) VALUES (?, ?, ?)",
+                (q, json.dumps(hits, ensure_ascii=False), int(now)),
+            )
+        with _lock:
+            _memory[q] = hits
+        return hits
+
 
 def get_pixabay_image(keyword, category, title):
-    # Versuche bis zu 4 Varianten (Schleife!)
-    for q in optimize_keywords(keyword, category, title, retries=4):
-        url = f"https://pixabay.com/api/?key={PIXABAY_API_KEY}&q={q}&image_type=photo&lang=de&per_page=20&safesearch=true"
+    for q in optimize_keywords(keyword, category, title):
         try:
-            resp = requests.get(url, timeout=10)
-            data = resp.json()
-            hits = data.get("hits", [])
+            hits = search_hits(q)
             if hits:
                 # Zufaelliges Bild auswählen (mehr Abwechslung)
                 pic = random.choice(hits)
@@ -0,0 +1,205 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import http_client
+from config import IMAGE_FORMAT, IMAGE_MAX_WIDTH, IMAGE_QUALITY, IMAGE_SPOOL_BYTES
+
+CHUNK_SIZE = 64 * 1024
+
+# Magic Bytes -> (MIME-Typ, Dateiendung)
+_SIGNATURES = [
+    (b"\xff\xd8\xff", ("image/jpeg", "jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", "png")),
+    (b"GIF87a", ("image/gif", "gif")),
+    (b"GIF89a", ("image/gif", "gif")),
+]
+
+_PIL_FORMATS = {"jpeg": ("JPEG", "image/jpeg", "jpg"), "webp": ("WEBP", "image/webp", "webp")}
+
+
+def sniff_content_type(head):
+    for magic, result in _SIGNATURES:
+        if head.startswith(magic):
+            return result
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif", "avif"
+    return None, None
+
+
+class UploadStream:
+    # Datei-Objekt für requests: bekannte Länge (-> Content-Length), wird beim
+    # Senden stückweise gelesen statt komplett im Speicher gehalten. Jeder Stream
+    # hat seinen eigenen Lesezeiger, mehrere können sich eine Datei teilen (lock).
+    def __init__(self, fileobj, size, lock=None):
+        self._file = fileobj
+        self._size = size
+        self._pos = 0
+        self._lock = lock or threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        with self._lock:
+            self._file.seek(self._pos)
+            data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = offset
+        return self._pos
+
+
+class PreparedImage:
+    # Geladenes (ggf. umgewandeltes) Bild in einer Spool-Datei. Mehrere Zielseiten
+    # laden es über je einen eigenen stream() hoch; close() gibt die Datei frei.
+    def __init__(self, spool, size, headers, stats):
+        self._spool = spool
+        self._lock = threading.Lock()
+        self.size = size
+        self.headers = headers
+        self.stats = stats
+
+    def stream(self):
+        return UploadStream(self._spool, self.size, self._lock)
+
+    def close(self):
+        self._spool.close()
+
+
+def _spool():
+    # Bis IMAGE_SPOOL_BYTES im Speicher, darüber automatisch in eine Temp-Datei
+    return tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_BYTES)
+
+
+def download_image(image_url):
+    start = time.monotonic()
+    spool = _spool()
+    size = 0
+    digest = hashlib.sha256()
+    with http_client.get(image_url, endpoint="image", stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            spool.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    spool.seek(0)
+    return spool, size, time.monotonic() - start, digest.hexdigest()
+
+
+def _pil_image():
+    # Pillow erst beim ersten Bild laden
+    try:
+        from PIL import Image
+    except ImportError:  # Pillow ist optional – ohne wird das Bild unverändert hochgeladen
+        return None
+    return Image
+
+
+def transform_image(spool, size):
+    # Verkleinert auf IMAGE_MAX_WIDTH bzw. wandelt nach IMAGE_FORMAT um (IMAGE_QUALITY).
+    # Neu kodiert wird nur dann; EXIF und ICC-Profil bleiben erhalten.
+    # Gibt None zurück, wenn nichts zu tun ist oder das Ergebnis nicht kleiner wäre.
+    if not IMAGE_MAX_WIDTH and not IMAGE_FORMAT:
+        return None
+    Image = _pil_image()
+    if Image is None:
+        return None
+    spool.seek(0)
+    try:
+        with Image.open(spool) as img:
+            resize = bool(IMAGE_MAX_WIDTH) and img.width > IMAGE_MAX_WIDTH
+            if not resize and not IMAGE_FORMAT:
+                return None
+            target_width = IMAGE_MAX_WIDTH if resize else img.width
+            target_height = max(1, round(img.height * target_width / img.width))
+            fmt = IMAGE_FORMAT or (img.format or "jpeg").lower()
+            if fmt not in _PIL_FORMATS:
+                return None
+            pil_format, mime, ext = _PIL_FORMATS[fmt]
+            # Bei JPEG gleich verkleinert dekodieren, spart Speicher
+            img.draft("RGB", (target_width, target_height))
+            out_img = img.convert("RGB")
+            if out_img.width > target_width:
+                out_img = out_img.resize((target_width, target_height), Image.LANCZOS)
+            keep = {k: img.info[k] for k in ("exif", "icc_profile") if img.info.get(k)}
+            out = _spool()
+            out_img.save(out, pil_format, quality=IMAGE_QUALITY, optimize=True, **keep)
+    except Exception as e:
+        logging.warning(f"Bild-Umwandlung fehlgeschlagen, lade Original hoch: {e}")
+        return None
+    new_size = out.tell()
+    if new_size >= size:
+        out.close()
+        return None
+    out.seek(0)
+    return out, new_size, mime, ext
+
+
+def upload_filename(image_url, ext):
+    name = os.path.basename(urlsplit(image_url).path) or "bild"
+    stem = os.path.splitext(name)[0] or "bild"
+    return f"{stem}.{ext}"
+
+
+def prepare_upload(image_url):
+    # Lädt das Bild gestreamt, erkennt den echten Typ und wandelt es ggf. um
+    spool, original_size, download_time, content_hash = download_image(image_url)
+    mime, ext = sniff_content_type(spool.read(16))
+    spool.seek(0)
+    if mime is None:
+        spool.close()
+        raise ValueError(f"Kein bekanntes Bildformat: {image_url}")
+    stats = {
+        "content_hash": content_hash,
+        "original_bytes": original_size,
+        "upload_bytes": original_size,
+        "download_time": round(download_time, 3),
+        "transform_time": 0.0,
+    }
+    start = time.monotonic()
+    transformed = transform_image(spool, original_size)
+    stats["transform_time"] = round(time.monotonic() - start, 3)
+    if transformed:
+        spool.close()
+        spool, stats["upload_bytes"], mime, ext = transformed
+    headers = {
+        "Content-Disposition": f'attachment; filename="{upload_filename(image_url, ext)}"',
+        "Content-Type": mime,
+    }
+    return PreparedImage(spool, stats["upload_bytes"], headers, stats)
+
+
+def log_transfer(image_url, stats, upload_time):
+    saved = stats["original_bytes"] - stats["upload_bytes"]
+    rate = stats["upload_bytes"] / upload_time if upload_time > 0 else 0
+    saved_time = saved / rate if rate else 0
+    percent = 100 * saved / stats["original_bytes"] if stats["original_bytes"] else 0
+    logging.info(
+        f"Bild übertragen: {stats['original_bytes'] // 1024} KB -> {stats['upload_bytes'] // 1024} KB "
+        f"(-{percent:.0f}%, ca. {saved_time:.1f}s Upload gespart) | Download {stats['download_time']}s, "
+        f"Umwandlung {stats['transform_time']}s, Upload {upload_time:.2f}s [{image_url}]"
+    )
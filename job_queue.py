@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from config import DB_PATH, JOB_LOCK_TIMEOUT, JOB_MAX_ATTEMPTS, JOB_RETENTION_DAYS
+from storage import get_db
+
+# Reihenfolge der Zwischenstände eines Eintrags. Der Fortschritt pro Zielseite
+# (Medien-ID, Beitrags-ID) steht im Eintrag unter "sites".
+STATES = ("fetched", "generated", "image_resolved", "published")
+FINAL_STATES = ("published", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    entry_key TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    locked_by TEXT,
+    locked_at INTEGER,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, updated_at);
+"""
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def state_reached(item, state):
+    return STATES.index(item.get("state", "fetched")) >= STATES.index(state)
+
+
+class JobQueue:
+    # Dauerhafte Warteschlange: jeder Eintrag wandert durch STATES, der Inhalt
+    # (item-Dict) wird nach jeder Stufe gespeichert. Nach einem Absturz geht es
+    # ab der letzten fertigen Stufe weiter. Mehrere Prozesse teilen sich die
+    # Tabelle; locked_by verhindert, dass zwei denselben Job bearbeiten.
+    def __init__(self, path=DB_PATH, owner=None):
+        self.db = get_db(path)
+        self.db.executescript(SCHEMA)
+        self.owner = owner or default_owner()
+
+    def enqueue(self, item, lock=False):
+        # Gibt das item mit job_id zurück, oder None, wenn der Eintrag schon in der Queue ist
+        key = item.get("link") or item["content_hash"]
+        now = int(time.time())
+        item = dict(item, state="fetched")
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (entry_key, state, payload, locked_by, locked_at, created_at, updated_at) "
+                "VALUES (?, 'fetched', ?, ?, ?, ?, ?)",
+                (key, json.dumps(item, ensure_ascii=False), self.owner if lock else None,
+                 now if lock else None, now, now),
+            )
+            if not cursor.rowcount:
+                return None
+            item["job_id"] = cursor.lastrowid
+        return item
+
+    def checkpoint(self, item, state):
+        item["state"] = state
+        self.db.execute(
+            "UPDATE jobs SET state = ?, payload = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (state, json.dumps(item, ensure_ascii=False), int(time.time()), item["job_id"]),
+        )
+
+    def fail(self, item, error):
+        # Nach JOB_MAX_ATTEMPTS Fehlversuchen endgültig aufgeben
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, error = ?, locked_by = NULL, locked_at = NULL, "
+                "updated_at = ?, state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE state END "
+                "WHERE id = ?",
+                (str(error)[:1000], int(time.time()), JOB_MAX_ATTEMPTS, item["job_id"]),
+            )
+
+    def release(self, item):
+        self.db.execute(
+            "UPDATE jobs SET locked_by = NULL, locked_at = NULL WHERE id = ? AND locked_by = ?",
+            (item["job_id"], self.owner),
+        )
+
+    def claim(self, limit=None, states=None):
+        # Offene Jobs übernehmen: nicht gesperrt oder Sperre abgelaufen (Prozess abgestürzt)
+        states = states or [s for s in STATES if s != "published"]
+        now = int(time.time())
+        placeholders = ",".join("?" * len(states))
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                f"SELECT id, payload FROM jobs WHERE state IN ({placeholders}) "
+                "AND (locked_by IS NULL OR locked_at < ?) ORDER BY id LIMIT ?",
+                (*states, now - JOB_LOCK_TIMEOUT, limit if limit else -1),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET locked_by = ?, locked_at = ? WHERE id = ?",
+                [(self.owner, now, row_id) for row_id, _ in rows],
+            )
+        items = []
+        for row_id, payload in rows:
+            item = json.loads(payload)
+            item["job_id"] = row_id
+            items.append(item)
+        return items
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+    def prune(self, max_age_days=JOB_RETENTION_DAYS):
+        if not max_age_days or max_age_days <= 0:
+            return 0
+        cutoff = int(time.time() - max_age_days * 86400)
+        with self.db.transaction() as conn:
+            removed = conn.execute(
+                "DELETE FROM jobs WHERE state IN ('published', 'failed') AND updated_at < ?", (cutoff,)
+            ).rowcount
+        if removed:
+            logging.info(f"Job-Queue: {removed} alte Jobs entfernt.")
+        return removed
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+
+import metrics
+import prompt_builder
+import rate_limit
+import model_router
+from article_parser import ParseError, json_schema
+from config import (
+    KAT_IDS, OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MAX_TOKENS, OPENAI_MODEL, OPENAI_ORG, OPENAI_STREAM,
+)
+from llm_cache import LLMCache, cache_key
+
+_client = None
+_cache = None
+_lock = threading.Lock()
+
+metrics.set_buckets("openai_input_tokens", metrics.TOKEN_BUCKETS)
+
+
+def get_client():
+    # openai ist der mit Abstand teuerste Import -> erst beim ersten echten Aufruf laden
+    global _client
+    with _lock:
+        if _client is None:
+            import openai
+            _client = openai.OpenAI(api_key=OPENAI_API_KEY, organization=OPENAI_ORG, base_url=OPENAI_BASE_URL)
+        return _client
+
+
+def get_cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def build_messages(prompt_txt, json_mode=False):
+    return [
+        {"role": "system", "content": prompt_builder.system_prompt(json_mode)},
+        {"role": "user", "content": prompt_txt},
+    ]
+
+
+def _field(obj, name):
+    # usage kommt als SDK-Objekt (synchron) oder als Dict (Batch-Ausgabe)
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def record_usage(model, usage, log=True, batch=False):
+    if usage is None:
+        return
+    prompt_tokens = _field(usage, "prompt_tokens") or 0
+    completion_tokens = _field(usage, "completion_tokens") or 0
+    cached = _field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0
+    cost = model_router.cost(model, prompt_tokens, completion_tokens, cached, batch=batch)
+    metrics.inc("openai_tokens", prompt_tokens, model=model, type="prompt")
+    metrics.inc("openai_tokens", cached, model=model, type="cached")
+    metrics.inc("openai_tokens", completion_tokens, model=model, type="completion")
+    metrics.inc("openai_cost_usd", cost, model=model)
+    metrics.observe("openai_input_tokens", prompt_tokens, model=model)
+    if log:
+        logging.info(
+            f"GPT ({model}): {prompt_tokens} Input-Tokens ({cached} aus dem Prompt-Cache), "
+            f"{completion_tokens} Output-Tokens, ca. {cost:.4f} USD"
+        )
+
+
+def _stream(model, messages, temperature, max_tokens, parser):
+    # Antwort stückweise an den Parser geben; wirft er einen ParseError, wird der
+    # Stream sofort geschlossen und die restliche Generierung nicht abgewartet
+    start = time.monotonic()
+    raw = get_client().chat.completions.with_raw_response.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    rate_limit.observe_headers("openai", raw.headers)
+    stream = raw.parse()
+    usage, first = None, True
+    try:
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            for choice in chunk.choices:
+                if choice.delta and choice.delta.content:
+                    if first:
+                        metrics.observe("openai_first_token_seconds", time.monotonic() - start, model=model)
+                        first = False
+                    parser.feed(choice.delta.content)
+    except ParseError:
+        metrics.inc("openai_aborted", model=model)
+        raise
+    finally:
+        stream.close()
+        metrics.observe("openai_seconds", time.monotonic() - start, model=model)
+    record_usage(model, usage)
+    return parser.text
+
+
+def generate(prompt_txt, model=OPENAI_MODEL, temperature=0.7, max_tokens=OPENAI_MAX_TOKENS, replay=False, validate=None,
+             stream_parser=None, json_mode=False, meta=None):
+    # Antworten werden gecacht, damit ein Retry nach Fehlern (Pixabay, WP, Timeout)
+    # nicht noch einmal die komplette Generierung bezahlt.
+    # replay=True: nur aus dem Cache, nie die API aufrufen.
+    # stream_parser (article_parser.StreamParser): Antwort streamen und mitlesen.
+    # json_mode: Structured Outputs nach article_parser.json_schema (ohne Streaming)
+    # meta: Eintragsdaten, die mit der Antwort gecacht werden (siehe LLMCache.replayable)
+    if json_mode:
+        stream_parser = None
+    messages = build_messages(prompt_txt, json_mode)
+    key = cache_key(model, messages, temperature)
+    cached = get_cache().get(key)
+    if cached is not None:
+        logging.info("GPT-Antwort aus dem Cache.")
+        if stream_parser is not None:
+            stream_parser.feed(cached)
+        return cached
+    if replay:
+        raise CacheMiss("Keine gecachte GPT-Antwort (Replay-Modus)")
+    # Eingabe-Tokens plus maximale Antwortlänge; so rechnet auch OpenAI gegen das Token-Limit
+    input_tokens = sum(prompt_builder.count_tokens(m["content"]) for m in messages)
+    rate_limit.acquire("openai")
+    rate_limit.acquire("openai_tokens", input_tokens + max_tokens)
+    if stream_parser is not None and OPENAI_STREAM:
+        reply = _stream(model, messages, temperature, max_tokens, stream_parser).strip()
+        if validate is None or validate(reply):
+            get_cache().put(key, model, reply, meta)
+        return reply
+    extra = {"response_format": json_schema(KAT_IDS)} if json_mode else {}
+    with metrics.timer("openai_seconds", model=model):
+        raw = get_client().chat.completions.with_raw_response.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **extra,
+        )
+    rate_limit.observe_headers("openai", raw.headers)
+    response = raw.parse()
+    record_usage(model, response.usage)
+    reply = response.choices[0].message.content.strip()
+    if stream_parser is not None:
+        stream_parser.feed(reply)
+    # Unbrauchbare Antworten nicht cachen, sonst kommt beim Retry dieselbe wieder
+    if validate is None or validate(reply):
+        get_cache().put(key, model, reply, meta)
+    return reply
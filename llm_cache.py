@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import DB_PATH, LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_ENTRIES
+from storage import get_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    last_used INTEGER NOT NULL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+"""
+
+
+def cache_key(model, messages, temperature):
+    # Inhaltsadresse: gleiches Modell + gleicher Prompt + gleiche Temperatur = gleicher Schlüssel
+    payload = json.dumps([model, messages, temperature], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=DB_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, max_age_days=LLM_CACHE_MAX_AGE_DAYS):
+        self.db = get_db(path)
+        self.db.executescript(SCHEMA)
+        self._migrate()
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _migrate(self):
+        # Ältere Datenbanken: Spalte für die Eintragsdaten (Replay) nachrüsten
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(llm_cache)")}
+        if "meta" not in columns:
+            try:
+                self.db.execute("ALTER TABLE llm_cache ADD COLUMN meta TEXT")
+            except sqlite3.OperationalError as e:
+                # Ein anderer Prozess war schneller
+                if "duplicate column" not in str(e):
+                    raise
+
+    def get(self, key):
+        rows = self.db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,))
+        with self._lock:
+            if rows:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not rows:
+            return None
+        self.db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (int(time.time()), key))
+        return rows[0][0]
+
+    def put(self, key, model, response, meta=None):
+        # meta: Daten des Feed-Eintrags (Titel, Link, Text), damit main.replay_cache() den Beitrag
+        # ohne Feed, Dedup und Job-Queue neu aufbauen kann
+        now = int(time.time())
+        self.db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used, meta) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, now, now, json.dumps(meta, ensure_ascii=False) if meta else None),
+        )
+
+    def replayable(self, limit=0):
+        # Gecachte Generierungen mit Eintragsdaten, neueste zuerst -> [(meta, response)]
+        rows = self.db.execute(
+            "SELECT meta, response FROM llm_cache WHERE meta IS NOT NULL ORDER BY created_at DESC"
+            + (" LIMIT ?" if limit and limit > 0 else ""),
+            (limit,) if limit and limit > 0 else (),
+        )
+        return [(json.loads(meta), response) for meta, response in rows]
+
+    def delete(self, key):
+        self.db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def evict(self):
+        # Erst nach Alter, dann die am längsten ungenutzten über dem Limit
+        removed = 0
+        with self.db.transaction() as conn:
+            if self.max_age_days and self.max_age_days > 0:
+                cutoff = int(time.time() - self.max_age_days * 86400)
+                removed += conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries and self.max_entries > 0:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+        if removed:
+            logging.info(f"LLM-Cache: {removed} Einträge verworfen.")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM llm_cache")[0][0]
@@ -1,154 +1,846 @@
-import feedparser
-import openai
-import requests
 import html
+import json
 import logging
+import os
+import signal
+import threading
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from contextlib import closing
+from itertools import chain
 
 from config import (
-    OPENAI_API_KEY, OPENAI_ORG, WP_URL, WP_USER, WP_APP_PASSWORD,
-    PIXABAY_API_KEY, KAT_IDS
+    PIXABAY_API_KEY, DEDUP_TTL_DAYS, NEAR_DUP_MAX_DISTANCE,
+    PIPELINE_GENERATE_WORKERS, PIPELINE_IMAGE_WORKERS, PIPELINE_PUBLISH_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    RSS_FEEDS_FILE, DAEMON_MAX_SLEEP, METRICS_REPORT_FILE, METRICS_PROM_FILE, METRICS_PORT,
+    OPENAI_OUTPUT_MODE, DB_PATH,
 )
 from utils import (
-    load_rss_feeds, load_posted_titles, save_posted_title, save_posted_hash,
-    make_prompt, upload_image_to_wp,
+    load_feed_config, make_prompt, prepare_image, upload_image_to_wp,
     get_or_create_tag_id, to_html_paragraphs, hash_content, send_health_report
 )
 
-from image_search import get_pixabay_image
+from image_search import cache_stats as pixabay_cache_stats, get_pixabay_image
+from feed_fetcher import commit_feed_state, fetch_feeds, log_fetch_summary
+from pipeline import run_pipeline
+from near_dup import entry_text, hamming, simhash
+import article_parser
+import llm
+import batch
+import http_client
+import metrics
+import model_router
+import rate_limit
+import relevance
+import sites
+import storage
+from job_queue import get_job_queue, state_reached
+from scheduler import FeedScheduler
 
-# --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler("newsbot.log"),
-        logging.StreamHandler()
-    ]
-)
+# Beim Import passiert nichts Teures: Logging richtet erst der Befehl ein, Feeds,
+# Datenbanken und API-Clients werden beim ersten Gebrauch geladen.
+
+
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler("newsbot.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+
+# URL -> {"weight", "category"} aus rss_feeds.txt
+_feed_options = None
 
-client = openai.OpenAI(api_key=OPENAI_API_KEY, organization=OPENAI_ORG)
-RSS_FEEDS = load_rss_feeds()
-POSTED_TITLES = load_posted_titles()
-POSTED_HASHES = load_posted_titles(filename="posted_hashes.txt")
+
+def feed_options():
+    global _feed_options
+    if _feed_options is None:
+        _feed_options = load_feed_config(RSS_FEEDS_FILE)
+    return _feed_options
+
+
+metrics.register("http", http_client.stats)
+metrics.register("pixabay_cache", pixabay_cache_stats)
+metrics.register("llm_cache", lambda: llm.get_cache().stats())
+metrics.register("rate_limit", rate_limit.stats)
+metrics.register("jobs", lambda: get_job_queue().counts())
 
 success_count, error_count = 0, 0
+# Replay-Modus: Beiträge nur aus gecachten GPT-Antworten bauen, keine API-Aufrufe
+REPLAY = False
+_count_lock = threading.Lock()
+# Titel/Hashes/SimHashes, die in diesem Lauf gerade verarbeitet werden (Pipeline-Modus)
+_in_flight = set()
+_in_flight_simhashes = []
+# job_id -> Startzeit in diesem Lauf, für die Gesamtdauer pro Eintrag
+_entry_started = {}
+# Tags vorab auflösen, während die Bildsuche läuft
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+# Ein Pool pro Zielseite: eine langsame Seite staut nur ihre eigene Warteschlange
+_site_pools = {}
+
 
-def process_entry(entry, feed_url):
+def count_result(ok, item=None):
     global success_count, error_count
-    try:
-        title = html.unescape(entry.title.strip())
-        summary = html.unescape(entry.summary.strip() if 'summary' in entry else entry.description.strip())
-        link = entry.link.strip()
-        if title in POSTED_TITLES:
-            logging.info(f"Schon verarbeitet: {title}")
-            return
-        content_hash = hash_content(summary)
-        if content_hash in POSTED_HASHES:
-            logging.info(f"Doppelter Inhalt (Hash) erkannt, wird übersprungen: {title}")
-            return
-        prompt_txt = make_prompt(summary, title)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Du bist ein moderner, deutschsprachiger Tech-Redakteur."},
-                {"role": "user", "content": prompt_txt}
-            ],
-            temperature=0.7,
-            max_tokens=1500,
-        )
-        full_reply = response.choices[0].message.content.strip()
-        print(f"\n--- GPT-Output Start ---\n{full_reply}\n--- GPT-Output Ende ---\n")
-        lines = [l for l in full_reply.split("\n") if l.strip()]
-        if len(lines) < 4:
-            logging.warning("GPT-Output zu kurz, wird übersprungen.")
-            error_count += 1
-            return
-        de_title = lines[0].strip(" *\"'\n\r\t`")
-        rest = "\n".join(lines[1:]).strip()
-        import re
-        kategorie_match = re.search(r"\[Kategorie:\s*(.*?)\]", rest)
-        kategorie_name = kategorie_match.group(1).strip() if kategorie_match else "IT"
-        keyword_match = re.search(r"\[Schlagwort:\s*(.*?)\]", rest)
-        focus_keyword = keyword_match.group(1).strip() if keyword_match else ""
-        rewritten = re.sub(r"\[Kategorie:.*?\]", "", rest)
-        rewritten = re.sub(r"\[Schlagwort:.*?\]", "", rewritten).strip()
-        rewritten = rewritten.strip(" *\"'\n\r\t[]")
-        html_content = to_html_paragraphs(rewritten)
-        html_content += (
-            f'<p><strong>Quelle:</strong> '
-            f'<a href="{link}" target="_blank" rel="noopener">{title}</a></p>'
-            '<div style="margin-top:24px;">'
-            '<a href="https://niceeins.de/newsletter/" target="_blank">📰 Jetzt Nice Eins KI-Newsletter abonnieren!</a>'
-            '</div>'
-            '<div style="margin-top:8px;">'
-            'Teile diesen Artikel: <a href="https://twitter.com/intent/tweet?text='
-            f'{de_title} - {link}">Twitter</a></div>'
-        )
-        logging.info(f"Kategorie erkannt: {kategorie_name} / Schlagwort: {focus_keyword}")
-        kat_id = KAT_IDS.get(kategorie_name, KAT_IDS["IT"])
-        tag_id = get_or_create_tag_id(focus_keyword)
-        # Bilder-Logik: Versuche mit mehreren Anläufen bessere Bilder zu bekommen
-        max_image_tries = 3
-        image_url = None
-        pixabay_link = None
-        for i in range(max_image_tries):
-            image_url, pixabay_link = get_pixabay_image(focus_keyword, kategorie_name, de_title)
-            if image_url:
-                logging.info(f"Pixabay-Bild gefunden (Versuch {i+1}): {image_url}")
-                break
-            else:
-                logging.warning(f"Kein passendes Pixabay-Bild (Versuch {i+1}) für {focus_keyword}/{kategorie_name}/{de_title}")
-                time.sleep(1)
-        media_id = upload_image_to_wp(image_url, de_title, pixabay_link) if image_url else None
-        if pixabay_link:
-            html_content += f'<p><strong>Bildquelle:</strong> <a href="{pixabay_link}" target="_blank" rel="noopener">Bildquelle</a></p>'
-        post_data = {
-            "title": de_title,
-            "content": html_content,
-            "status": "publish",
-            "categories": [kat_id],
-            "tags": [tag_id] if tag_id else [],
-        }
-        if media_id:
-            post_data["featured_media"] = media_id
-            time.sleep(10)
-        wp_response = requests.post(
-            f"{WP_URL}/wp-json/wp/v2/posts",
-            json=post_data,
-            auth=(WP_USER, WP_APP_PASSWORD),
-            timeout=20
-        )
-        if wp_response.status_code == 201:
-            logging.info(f"Artikel veröffentlicht: {de_title} ({kategorie_name} / {focus_keyword})")
-            save_posted_title(title)
-            save_posted_hash(content_hash)
+    with _count_lock:
+        if ok:
             success_count += 1
-            time.sleep(10)
         else:
-            logging.error(f"WP-Fehler: {wp_response.status_code} – {wp_response.text}")
             error_count += 1
+        started = _entry_started.pop(item["job_id"], None) if item else None
+    metrics.inc("entries", result="published" if ok else "failed")
+    if started is not None:
+        metrics.observe("entry_seconds", time.monotonic() - started)
+
+
+def posted_reason(site, title, link, content_hash, near_hash):
+    # Warum die Seite den Eintrag nicht mehr braucht, oder None
+    if site.dedup.has_title(title) or site.dedup.has_link(link):
+        return f"Schon verarbeitet: {title}"
+    if site.dedup.has_hash(content_hash):
+        return f"Doppelter Inhalt (Hash) erkannt, wird übersprungen: {title}"
+    if near_hash is not None:
+        match = site.near_dup.find_hash(near_hash)
+        if match:
+            return (
+                f"Ähnliche Meldung schon veröffentlicht (Abstand {match['distance']}): "
+                f"{title} ~ {match['title']}"
+            )
+    return None
+
+
+def prepare_entry(entry, feed_url, site_list=None, track=True):
+    # site_list: Seiten für die Dedup-Prüfung (Standard: alle); track=False prüft nur
+    # und merkt den Eintrag nicht als "in Arbeit" vor (Probelauf)
+    title = html.unescape(entry.title.strip())
+    summary = html.unescape(entry.summary.strip() if 'summary' in entry else entry.description.strip())
+    link = entry.link.strip()
+    content_hash = hash_content(summary)
+    # Vor dem teuren GPT-Aufruf: leicht umformulierte Syndizierungen abfangen
+    near_hash = simhash(entry_text(title, summary)) if NEAR_DUP_MAX_DISTANCE >= 0 else None
+    # Generiert wird, solange mindestens eine Seite den Eintrag noch nicht hat
+    targets, reasons = [], []
+    for site in site_list or sites.get_sites():
+        reason = posted_reason(site, title, link, content_hash, near_hash)
+        if reason:
+            reasons.append(reason)
+        else:
+            targets.append(site.name)
+    if not targets:
+        logging.info(reasons[0])
+        return None
+    if not track:
+        return _entry_item(feed_url, title, summary, link, content_hash, near_hash, targets)
+    with _count_lock:
+        if title in _in_flight or content_hash in _in_flight:
+            logging.info(f"Wird in diesem Lauf schon verarbeitet: {title}")
+            return None
+        if near_hash is not None and any(
+            hamming(near_hash, other) <= NEAR_DUP_MAX_DISTANCE for other in _in_flight_simhashes
+        ):
+            logging.info(f"Ähnliche Meldung wird in diesem Lauf schon verarbeitet: {title}")
+            return None
+        _in_flight.update((title, content_hash))
+        if near_hash is not None:
+            _in_flight_simhashes.append(near_hash)
+    return _entry_item(feed_url, title, summary, link, content_hash, near_hash, targets)
+
+
+def _entry_item(feed_url, title, summary, link, content_hash, near_hash, targets):
+    return {
+        "feed_url": feed_url,
+        "title": title,
+        "summary": summary,
+        "link": link,
+        "content_hash": content_hash,
+        "simhash": near_hash,
+        "targets": targets,
+    }
+
+
+class StageError(Exception):
+    pass
+
+
+def _prefetch_tags(keyword, targets):
+    # Tags legt WordPress ggf. neu an -> erst für eine gültige Antwort und nur auf den Zielseiten
+    for site in targets:
+        get_or_create_tag_id(keyword, site)
+
+
+JSON_MODE = OPENAI_OUTPUT_MODE == "json"
+
+
+# Eintragsdaten, die mit der GPT-Antwort gecacht werden (für replay_cache)
+CACHE_META_FIELDS = ("title", "summary", "link", "feed_url", "feed_category")
+
+
+def cache_meta(item):
+    return {field: item.get(field) for field in CACHE_META_FIELDS}
+
+
+def apply_article(item, article):
+    item.update({
+        "de_title": article["title"],
+        "body": article["body"],
+        "category": article["category"],
+        "keyword": article["keyword"],
+    })
+    return item
+
+
+def generate_article(item):
+    prompt_txt = make_prompt(item["summary"], item["title"])
+    item["model"] = model = model_router.choose_model(item)
+    # Der Stream wird mitgelesen, damit kaputte Antworten früh abbrechen
+    parser = article_parser.StreamParser()
+    parse = article_parser.parse_json if JSON_MODE else article_parser.parse_reply
+    try:
+        full_reply = llm.generate(
+            prompt_txt, model=model, replay=REPLAY,
+            validate=article_parser.is_valid_json if JSON_MODE else article_parser.is_valid,
+            stream_parser=parser, json_mode=JSON_MODE, meta=cache_meta(item),
+        )
+        article = parse(full_reply)
+    except llm.CacheMiss:
+        logging.info(f"Replay: keine gecachte Antwort, übersprungen: {item['title']}")
+        return None
+    except article_parser.ParseError as e:
+        raise StageError(str(e))
+    print(f"\n--- GPT-Output Start ---\n{full_reply}\n--- GPT-Output Ende ---\n")
+    logging.info(f"Kategorie erkannt: {article['category']} / Schlagwort: {article['keyword']}")
+    # Tag-Auflösung läuft parallel zur Bildsuche; publish_article findet die IDs im Cache
+    _prefetch_pool.submit(_prefetch_tags, article["keyword"], pending_sites(item))
+    return apply_article(item, article)
+
+
+def find_image(item):
+    focus_keyword, kategorie_name, de_title = item["keyword"], item["category"], item["de_title"]
+    # Queries sind deterministisch und gecacht – ein erneuter Versuch brächte dasselbe Ergebnis
+    image_url, pixabay_link = get_pixabay_image(focus_keyword, kategorie_name, de_title)
+    if not image_url:
+        logging.warning(f"Kein passendes Pixabay-Bild für {focus_keyword}/{kategorie_name}/{de_title}")
+    item.update({"image_url": image_url, "pixabay_link": pixabay_link})
+    return item
+
+
+def build_html(item):
+    title, link, de_title = item["title"], item["link"], item["de_title"]
+    html_content = to_html_paragraphs(item["body"])
+    html_content += (
+        f'<p><strong>Quelle:</strong> '
+        f'<a href="{link}" target="_blank" rel="noopener">{title}</a></p>'
+        '<div style="margin-top:24px;">'
+        '<a href="https://niceeins.de/newsletter/" target="_blank">📰 Jetzt Nice Eins KI-Newsletter abonnieren!</a>'
+        '</div>'
+        '<div style="margin-top:8px;">'
+        'Teile diesen Artikel: <a href="https://twitter.com/intent/tweet?text='
+        f'{de_title} - {link}">Twitter</a></div>'
+    )
+    if item.get("pixabay_link"):
+        html_content += f'<p><strong>Bildquelle:</strong> <a href="{item["pixabay_link"]}" target="_blank" rel="noopener">Bildquelle</a></p>'
+    return html_content
+
+
+def _create_post(site, post_data):
+    return http_client.post(
+        f"{site.url}/wp-json/wp/v2/posts",
+        endpoint="wp_posts",
+        json=post_data,
+        auth=site.auth,
+        rate_key=site.rate_key,
+    )
+
+
+def publish_article(item, site, checkpoint=None, image=None, status="publish", remember=True):
+    # Bild hochladen und Beitrag anlegen, für genau eine Zielseite.
+    # checkpoint(site, fields) sichert Zwischenstände der Seite im Job,
+    # image liefert das gemeinsam vorbereitete Bild (siehe upload_image_to_wp).
+    # remember=False: nicht in Dedup eintragen (Replay aus dem Cache)
+    de_title, kategorie_name, focus_keyword = item["de_title"], item["category"], item["keyword"]
+    media_id = (item.get("sites") or {}).get(site.name, {}).get("media_id")
+    if media_id is None and item.get("image_url"):
+        media_id = upload_image_to_wp(item["image_url"], de_title, item["pixabay_link"], site, image=image)
+        if media_id and checkpoint:
+            # Scheitert danach der Beitrag, nutzt der Retry das schon hochgeladene Bild
+            checkpoint(site, {"media_id": media_id})
+    # Unbekannte GPT-Kategorie -> Kategorie des Feeds (falls angegeben) -> IT
+    kat_id = site.category_id(kategorie_name, item.get("feed_category"))
+    tag_id = get_or_create_tag_id(focus_keyword, site)
+    post_data = {
+        "title": de_title,
+        "content": build_html(item),
+        "status": status,
+        "categories": [kat_id],
+        "tags": [tag_id] if tag_id else [],
+    }
+    if media_id:
+        post_data["featured_media"] = media_id
+    wp_response = _create_post(site, post_data)
+    if wp_response.status_code == 400 and "featured_media" in post_data and "featured_media" in wp_response.text:
+        # Wiederverwendetes Medium gibt es in WordPress nicht mehr -> aus dem Index nehmen
+        logging.warning(f"Medien-ID {post_data['featured_media']} ungültig, poste ohne Beitragsbild.")
+        site.media_index.forget(post_data.pop("featured_media"))
+        wp_response = _create_post(site, post_data)
+    if wp_response.status_code != 201:
+        raise StageError(f"WP-Fehler: {wp_response.status_code} – {wp_response.text}")
+    logging.info(f"Artikel veröffentlicht auf {site.name} ({status}): {de_title} ({kategorie_name} / {focus_keyword})")
+    if remember:
+        site.dedup.mark_posted(item["title"], item["content_hash"], item["link"])
+        if item.get("simhash") is not None:
+            site.near_dup.add(item["title"], item["summary"], item["link"], h=item["simhash"])
+    return {"media_id": post_data.get("featured_media"), "post_id": wp_response.json().get("id")}
+
+
+# Zielzustand -> Stufe, die ihn herstellt. Veröffentlicht wird danach pro Seite (fan_out).
+STAGES = [
+    ("generated", generate_article),
+    ("image_resolved", find_image),
+]
+
+
+def run_stage(state, func, item):
+    # Führt eine Stufe aus und speichert danach den Zwischenstand in der Job-Queue.
+    # Schon erledigte Stufen (Wiederaufnahme nach Absturz) werden übersprungen.
+    if item is None or state_reached(item, state):
+        return item
+    with _count_lock:
+        _entry_started.setdefault(item["job_id"], time.monotonic())
+    try:
+        with metrics.timer("stage_seconds", stage=state):
+            result = func(item)
     except Exception as e:
         logging.error(f"Fehler im Artikel-Prozess: {e}")
-        error_count += 1
+        count_result(False, item)
+        get_job_queue().fail(item, e)
+        return None
+    if result is None:
+        with _count_lock:
+            _entry_started.pop(item["job_id"], None)
+        get_job_queue().release(item)
+        return None
+    get_job_queue().checkpoint(result, state)
+    return result
 
-def main(max_entries=2):
-    logging.info("🚀 Starte News-Bot ...")
-    start_time = time.time()
-    for feed_url in RSS_FEEDS:
-        logging.info(f"Lese Feed: {feed_url}")
-        feed = feedparser.parse(feed_url)
+
+def pending_sites(item):
+    # Ältere Jobs ohne "targets" gehen an alle Seiten
+    targets = item.get("targets") or [site.name for site in sites.get_sites()]
+    done = item.get("sites") or {}
+    return [site for site in sites.get_sites() if site.name in targets and not done.get(site.name, {}).get("post_id")]
+
+
+class FanOut:
+    # Ein generierter Eintrag, verteilt auf seine offenen Zielseiten. Jede Seite
+    # veröffentlicht in ihrem eigenen Pool; Fehler einer Seite betreffen nur sie.
+    # Der Job ist fertig, sobald sich die letzte Seite gemeldet hat. Gab es Fehler,
+    # wird er später wiederholt – dann nur noch für die fehlgeschlagenen Seiten.
+    def __init__(self, item, targets):
+        self.item = item
+        self.remaining = len(targets)
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._image = None
+        self._image_lock = threading.Lock()
+
+    def publish(self, site):
+        try:
+            with metrics.timer("site_publish_seconds", site=site.name):
+                result = publish_article(self.item, site, checkpoint=self.record, image=self.image)
+        except Exception as e:
+            logging.error(f"Fehler beim Veröffentlichen auf {site.name}: {e}")
+            metrics.inc("site_posts", site=site.name, result="failed")
+            with self._lock:
+                self.errors[site.name] = e
+        else:
+            metrics.inc("site_posts", site=site.name, result="published")
+            # Zwischenstand sichern, damit ein Retry diese Seite auslässt
+            self.record(site, result)
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining:
+                return
+        self.finish()
+
+    def image(self):
+        # Bild nur einmal pro Eintrag laden und umwandeln, alle Seiten laden dieselbe Datei hoch
+        with self._image_lock:
+            if self._image is None:
+                self._image = prepare_image(self.item["image_url"])
+            return self._image
+
+    def record(self, site, fields):
+        with self._lock:
+            self.item.setdefault("sites", {}).setdefault(site.name, {}).update(fields)
+            get_job_queue().checkpoint(self.item, self.item["state"])
+
+    def finish(self):
+        if self._image is not None:
+            self._image.close()
+        if self.errors:
+            count_result(False, self.item)
+            get_job_queue().fail(self.item, "; ".join(f"{name}: {e}" for name, e in self.errors.items()))
+        else:
+            get_job_queue().checkpoint(self.item, "published")
+            get_job_queue().release(self.item)
+            count_result(True, self.item)
+
+
+def site_pool(site):
+    with _count_lock:
+        pool = _site_pools.get(site.name)
+        if pool is None:
+            pool = _site_pools[site.name] = ThreadPoolExecutor(
+                max_workers=PIPELINE_PUBLISH_WORKERS, thread_name_prefix=f"publish-{site.name}"
+            )
+        return pool
+
+
+def fan_out(item):
+    # Verteilt den Eintrag auf die Seiten-Pools und gibt deren Futures zurück, ohne zu warten
+    if item is None or state_reached(item, "published"):
+        return []
+    with _count_lock:
+        _entry_started.setdefault(item["job_id"], time.monotonic())
+    targets = pending_sites(item)
+    fan = FanOut(item, targets)
+    if not targets:
+        fan.finish()
+        return []
+    return [site_pool(site).submit(fan.publish, site) for site in targets]
+
+
+def advance_job(item):
+    for state, func in STAGES:
+        item = run_stage(state, func, item)
+        if item is None:
+            return None
+    wait_futures(fan_out(item))
+    return item
+
+
+def fetch_results(feed_urls, feed_concurrency=None, conditional=True):
+    fetch_kwargs = {"max_workers": feed_concurrency} if feed_concurrency else {}
+    if not conditional:
+        # Ohne ETag/Last-Modified: liefert immer den kompletten Feed
+        fetch_kwargs["state_file"] = None
+    results = fetch_feeds(feed_urls, **fetch_kwargs)
+    log_fetch_summary(results)
+    return results
+
+
+def iter_entries(results):
+    # Alle Einträge aller Feeds in einem Durchgang nach Relevanz sortiert. Die Obergrenze
+    # pro Feed (--max) wenden die Aufrufer auf die neuen Einträge an, also die besten statt der ersten.
+    candidates = []
+    for feed_url, feed, stats in results:
+        if stats["not_modified"]:
+            continue
         if not feed.entries:
-            logging.warning("Keine Einträge gefunden.")
+            logging.warning(f"Keine Einträge gefunden: {feed_url}")
+            continue
+        candidates.extend((entry, feed_url) for entry in feed.entries)
+    for score, entry, feed_url in relevance.rank(candidates, feed_options()):
+        yield entry, feed_url, score
+
+
+def iter_new_jobs(results, max_entries=2, lock=True, budget=None):
+    # Neue Einträge prüfen und in die Job-Queue stellen, bis das Budget des Laufs erschöpft ist.
+    # Erst danach wird der Feed-Status gespeichert (siehe commit_feed_state).
+    budget = budget or relevance.Budget()
+    skipped = 0
+    held_back = set()
+    per_feed = {}
+    for entry, feed_url, score in iter_entries(results):
+        if per_feed.get(feed_url, 0) >= max_entries:
             continue
-        for entry in feed.entries[:max_entries]:
-            process_entry(entry, feed_url)
+        if budget.exhausted():
+            skipped += 1
+            held_back.add(feed_url)
+            continue
+        try:
+            item = prepare_entry(entry, feed_url)
+            if item is not None:
+                if not budget.take(item):
+                    skipped += 1
+                    held_back.add(feed_url)
+                    continue
+                per_feed[feed_url] = per_feed.get(feed_url, 0) + 1
+                item["score"] = round(score, 3)
+                item["feed_category"] = feed_options().get(feed_url, {}).get("category")
+                item = get_job_queue().enqueue(item, lock=lock)
+        except Exception as e:
+            logging.error(f"Fehler im Artikel-Prozess: {e}")
+            count_result(False)
+            continue
+        if item is not None:
+            yield item
+    commit_feed_state(results, skip=held_back)
+    if skipped:
+        logging.info(
+            f"Relevanz: {budget.entries} Einträge ausgewählt (ca. {budget.tokens} Tokens), "
+            f"{skipped} weniger relevante zurückgestellt."
+        )
+
+
+def claim_open_jobs():
+    jobs = get_job_queue().claim()
+    if jobs:
+        logging.info(f"Job-Queue: {len(jobs)} offene Jobs werden fortgesetzt.")
+    return jobs
+
+
+def run_sequential(items):
+    for item in items:
+        advance_job(item)
+
+
+def run_concurrent(items):
+    # Die Taktung pro Dienst übernimmt rate_limit (in http_client bzw. llm)
+    futures = []
+    run_pipeline(items, [
+        ("generate", lambda item: run_stage("generated", generate_article, item), PIPELINE_GENERATE_WORKERS),
+        ("image", lambda item: run_stage("image_resolved", find_image, item), PIPELINE_IMAGE_WORKERS),
+        ("publish", lambda item: futures.extend(fan_out(item)), 1),
+    ], queue_size=PIPELINE_QUEUE_SIZE)
+    # Die Seiten veröffentlichen unabhängig voneinander; erst hier auf alle warten
+    wait_futures(futures)
+
+
+def run_batch_mode(items):
+    # Erst alle neuen Einträge sammeln und per Batch-API generieren lassen,
+    # danach läuft die normale Pipeline nur noch gegen den Cache
+    global REPLAY
+    items = list(items)
+    if not items:
+        return
+    # Die Batch-API nimmt nur ein Modell pro Batch -> nach geroutetem Modell gruppieren
+    by_model = {}
+    for i, item in enumerate(items):
+        if not state_reached(item, "generated"):
+            model = model_router.choose_model(item)
+            by_model.setdefault(model, {})[str(i)] = make_prompt(item["summary"], item["title"])
+    validate = article_parser.is_valid_json if JSON_MODE else article_parser.is_valid
+    metas = {str(i): cache_meta(item) for i, item in enumerate(items)}
+    for model, prompts in by_model.items():
+        batch.run_batch(prompts, model=model, validate=validate, json_mode=JSON_MODE, metas=metas)
+    REPLAY = True
+    run_concurrent(items)
+
+
+def log_run_stats():
+    net = http_client.stats()
+    logging.info(
+        f"HTTP: {net['requests']} Requests, {net['retries']} Wiederholungen, "
+        f"{net['connections']} Verbindungen ({net['reused_connections']} wiederverwendet)"
+    )
+    pix = pixabay_cache_stats()
+    logging.info(
+        f"Pixabay-Cache: {pix['memory_hits']} Treffer im Speicher, {pix['db_hits']} aus der DB, "
+        f"{pix['misses']} API-Aufrufe"
+    )
+    rate_limit.log_stats()
+    model_router.log_model_stats()
+    logging.info(f"Job-Queue: {get_job_queue().counts()}")
+    stages = metrics.snapshot()["histograms"].get("stage_seconds", {})
+    for label, h in stages.items():
+        logging.info(f"Stufe {label.split('=', 1)[-1]}: {h['count']}x, p50 {h['p50']:.2f}s, p99 {h['p99']:.2f}s")
+    if len(sites.get_sites()) > 1:
+        log_site_stats()
+
+
+def log_site_stats():
+    snapshot = metrics.snapshot()
+    posts = snapshot["counters"].get("site_posts", {})
+    timings = snapshot["histograms"].get("site_publish_seconds", {})
+    for site in sites.get_sites():
+        h = timings.get(f"site={site.name}") or {}
+        p50 = h.get("p50")
+        logging.info(
+            f"Seite {site.name}: {int(posts.get(f'result=published,site={site.name}', 0))} veröffentlicht, "
+            f"{int(posts.get(f'result=failed,site={site.name}', 0))} Fehler, "
+            f"p50 {'-' if p50 is None else f'{p50:.2f}s'}"
+        )
+
+
+def export_metrics(duration):
+    # counters/histograms zählen seit Prozessstart (started_at), last_run nur den letzten
+    # Durchlauf -> im Daemon also den letzten Zyklus
+    if METRICS_REPORT_FILE:
+        metrics.write_report(
+            METRICS_REPORT_FILE,
+            last_run={"duration": duration, "success": success_count, "errors": error_count},
+        )
+    if METRICS_PROM_FILE:
+        metrics.write_prometheus(METRICS_PROM_FILE)
+
+
+def prune_sites():
+    for site in sites.get_sites():
+        site.dedup.prune()
+        site.near_dup.prune(DEDUP_TTL_DAYS)
+
+
+def housekeeping(replay=False):
+    prune_sites()
+    llm.get_cache().evict()
+    get_job_queue().prune()
+    if not replay:
+        for site in sites.get_sites():
+            site.tags.ensure_fresh()
+
+
+def fetch(max_entries=2, feed_concurrency=None):
+    # Nur Feeds lesen und neue Einträge in die Job-Queue stellen (ohne GPT/WordPress)
+    logging.info("📥 Lese Feeds in die Job-Queue ...")
+    prune_sites()
+    results = fetch_results(list(feed_options()), feed_concurrency)
+    new_jobs = sum(1 for _ in iter_new_jobs(results, max_entries, lock=False))
+    logging.info(f"Job-Queue: {new_jobs} neue Jobs. Stand: {get_job_queue().counts()}")
+
+
+def publish(sequential=False, replay=False, use_batch=False):
+    # Nur offene Jobs aus der Queue abarbeiten (z.B. in einem eigenen Prozess)
+    global REPLAY
+    REPLAY = replay
+    logging.info("📤 Arbeite Job-Queue ab ...")
+    start_time = time.time()
+    housekeeping(replay)
+    items = claim_open_jobs()
+    if sequential:
+        run_sequential(items)
+    elif use_batch and not replay:
+        run_batch_mode(items)
+    else:
+        run_concurrent(items)
+    log_run_stats()
+    send_health_report(success_count, error_count, int(time.time() - start_time))
+    export_metrics(int(time.time() - start_time))
+
+
+def main(max_entries=2, feed_concurrency=None, sequential=False, replay=False, use_batch=False):
+    global REPLAY
+    REPLAY = replay
+    logging.info("🚀 Starte News-Bot ..." + (" (Replay aus dem GPT-Cache)" if replay else ""))
+    start_time = time.time()
+    housekeeping(replay)
+    # Erst liegengebliebene Jobs (z.B. nach Absturz), dann neue Einträge
+    results = fetch_results(list(feed_options()), feed_concurrency)
+    items = chain(claim_open_jobs(), iter_new_jobs(results, max_entries))
+    if sequential:
+        run_sequential(items)
+    elif use_batch and not replay:
+        run_batch_mode(items)
+    else:
+        run_concurrent(items)
     end_time = time.time()
+    log_run_stats()
     send_health_report(success_count, error_count, int(end_time-start_time))
+    export_metrics(int(end_time-start_time))
+
+def replay_cache(site_name=None, status="draft", limit=0):
+    # Baut Beiträge aus gecachten GPT-Antworten neu, ohne OpenAI-Aufruf und an Dedup
+    # und Job-Queue vorbei (z.B. zum Testen oder nach Änderungen an build_html).
+    # Standardmäßig als Entwurf, damit nichts doppelt live geht.
+    start_time = time.time()
+    site = sites.get_site(site_name)
+    entries = llm.get_cache().replayable(limit)
+    logging.info(f"♻️ Replay: {len(entries)} gecachte Antworten -> {site.name} ({status})")
+    for meta, reply in entries:
+        item = dict(meta)
+        try:
+            parse = article_parser.parse_json if reply.lstrip().startswith("{") else article_parser.parse_reply
+            apply_article(item, parse(reply))
+            find_image(item)
+            publish_article(item, site, status=status, remember=False)
+        except Exception as e:
+            logging.error(f"Replay fehlgeschlagen für {meta.get('title')}: {e}")
+            count_result(False)
+            continue
+        count_result(True)
+    send_health_report(success_count, error_count, int(time.time() - start_time))
+
+
+def _reset_counts():
+    global success_count, error_count
+    with _count_lock:
+        success_count, error_count = 0, 0
+        _in_flight.clear()
+        _in_flight_simhashes.clear()
+
+
+def daemon(max_entries=2, feed_concurrency=None, sequential=False):
+    # Bleibt im Speicher: jeder Feed wird nach seinem eigenen Intervall abgefragt,
+    # neue Einträge landen in der Job-Queue und werden sofort abgearbeitet
+    global _feed_options
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    scheduler = FeedScheduler()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    feeds_mtime = None
+    last_housekeeping = 0
+    logging.info("🕒 Starte News-Bot als Daemon ...")
+    while not stop.is_set():
+        mtime = os.path.getmtime(RSS_FEEDS_FILE) if os.path.exists(RSS_FEEDS_FILE) else None
+        if mtime != feeds_mtime:
+            _feed_options = load_feed_config(RSS_FEEDS_FILE)
+            scheduler.sync_feeds(list(_feed_options))
+            feeds_mtime = mtime
+            logging.info(f"{len(_feed_options)} Feeds im Zeitplan.")
+        if time.time() - last_housekeeping > 3600:
+            housekeeping()
+            last_housekeeping = time.time()
+        due = scheduler.due_feeds()
+        if due:
+            start_time = time.time()
+            _reset_counts()
+            results = fetch_results(due, feed_concurrency)
+            for feed_url, feed, stats in results:
+                interval = scheduler.record(feed_url, feed, ok=not stats["error"])
+                logging.info(f"Nächster Abruf von {feed_url} in {int(interval or 0) // 60} min")
+            items = chain(claim_open_jobs(), iter_new_jobs(results, max_entries))
+            if sequential:
+                run_sequential(items)
+            else:
+                run_concurrent(items)
+            log_run_stats()
+            send_health_report(success_count, error_count, int(time.time() - start_time))
+            export_metrics(int(time.time() - start_time))
+        next_due = scheduler.next_due()
+        wait = DAEMON_MAX_SLEEP if next_due is None else min(DAEMON_MAX_SLEEP, max(1, next_due - time.time()))
+        stop.wait(wait)
+    logging.info("Daemon beendet.")
+
+
+# Befehle ohne OpenAI und ohne WordPress: laden weder openai noch die API-Clients
+
+
+def check_feeds(feed_concurrency=None):
+    # Jeden Feed einmal komplett laden und melden, welche kaputt oder leer sind
+    urls = list(feed_options())
+    results = {url: stats for url, _, stats in fetch_results(urls, feed_concurrency, conditional=False)}
+    problems = 0
+    for url in urls:
+        stats = results.get(url)
+        if stats is None or stats["error"]:
+            problems += 1
+            error = stats["error"] if stats else "Abruf fehlgeschlagen"
+            print(f"FEHLER  {url} ({error})")
+        elif not stats["entries"]:
+            problems += 1
+            print(f"LEER    {url} [HTTP {stats['status']}]")
+        else:
+            print(f"OK      {url} [HTTP {stats['status']}, {stats['entries']} Einträge, {stats['latency']}s]")
+    print(f"{len(urls)} Feeds geprüft, {problems} mit Problemen.")
+    return problems
+
+
+def dry_run(max_entries=2, feed_concurrency=None):
+    # Zeigt, was ein Lauf generieren würde (Relevanz, Budget, Zielseiten, Modell),
+    # ohne zu generieren, zu veröffentlichen oder Jobs anzulegen. Die Datenbanken werden
+    # nur gelesen; der einmalige Import der alten posted_*.txt bleibt dem echten Lauf.
+    results = fetch_results(list(feed_options()), feed_concurrency, conditional=False)
+    site_list = sites.load_sites_read_only()
+    budget = relevance.Budget()
+    deferred = 0
+    per_feed = {}
+    for entry, feed_url, score in iter_entries(results):
+        if per_feed.get(feed_url, 0) >= max_entries:
+            continue
+        item = prepare_entry(entry, feed_url, site_list=site_list, track=False)
+        if item is None:
+            continue
+        if not budget.take(item):
+            deferred += 1
+            continue
+        per_feed[feed_url] = per_feed.get(feed_url, 0) + 1
+        item["score"] = round(score, 3)
+        print(f"{item['score']:>7.3f}  {model_router.choose_model(item):<14} "
+              f"{','.join(item['targets']):<16} {item['title']}")
+    print(f"Probelauf: {budget.entries} Einträge würden generiert (ca. {budget.tokens} Tokens), "
+          f"{deferred} zurückgestellt.")
+
+
+def _count(conn, table):
+    rows = storage.read_rows(conn, f"SELECT COUNT(*) FROM {table}")
+    return rows[0][0] if rows else 0
+
+
+def show_stats():
+    # Zustand aus der lokalen Datenbank und dem letzten Run-Report. Nur lesend:
+    # legt keine Datenbank an und übernimmt keine alten posted_*.txt.
+    conn = storage.open_read_only(DB_PATH)
+    if conn is None:
+        print(f"Noch keine Datenbank ({DB_PATH}).")
+    else:
+        with closing(conn):
+            print(f"Job-Queue: {dict(storage.read_rows(conn, 'SELECT state, COUNT(*) FROM jobs GROUP BY state'))}")
+            print(f"GPT-Cache: {_count(conn, 'llm_cache')} Antworten")
+    for config in sites.read_site_config():
+        conn = storage.open_read_only(config["db_path"])
+        if conn is None:
+            if config["db_path"] != DB_PATH:
+                print(f"Seite {config['name']}: noch keine Datenbank ({config['db_path']})")
+            continue
+        with closing(conn):
+            dedup = dict(storage.read_rows(conn, "SELECT kind, COUNT(*) FROM posted GROUP BY kind"))
+            media = _count(conn, "media_index")
+        print(f"Seite {config['name']}: {dedup.get('title', 0)} Titel, {dedup.get('hash', 0)} Hashes, "
+              f"{dedup.get('link', 0)} Links in Dedup, {media} Medien im Index")
+    if not METRICS_REPORT_FILE or not os.path.exists(METRICS_REPORT_FILE):
+        return
+    with open(METRICS_REPORT_FILE, encoding="utf-8") as f:
+        report = json.load(f)
+    cost = sum(report.get("counters", {}).get("openai_cost_usd", {}).values())
+    last_run = report.get("last_run", {})
+    updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(os.path.getmtime(METRICS_REPORT_FILE)))
+    print(f"Letzter Lauf ({updated}): {last_run.get('success', 0)} veröffentlicht, "
+          f"{last_run.get('errors', 0)} Fehler, {last_run.get('duration', 0)}s, "
+          f"ca. {cost:.4f} USD seit Prozessstart")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument('command', nargs='?', default='run',
+                        choices=['run', 'fetch', 'publish', 'daemon', 'check-feeds', 'dry-run', 'stats', 'replay'],
+                        help='run = alles (Standard), fetch = nur Feeds in die Job-Queue, publish = nur Queue abarbeiten, '
+                             'daemon = dauerhaft laufen, Feeds nach eigenem Zeitplan, check-feeds = Feeds prüfen, '
+                             'dry-run = zeigen, was generiert würde, stats = Zustand und letzter Lauf, '
+                             'replay = Beiträge aus gecachten GPT-Antworten neu anlegen')
     parser.add_argument('--max', type=int, default=2, help='Wie viele News pro Feed?')
+    parser.add_argument('--feed-concurrency', type=int, default=None, help='Wie viele Feeds gleichzeitig laden?')
+    parser.add_argument('--sequential', action='store_true', help='Ein Eintrag nach dem anderen statt Pipeline (Taktung über die Rate-Limits)')
+    parser.add_argument('--replay', action='store_true', help='Neue Einträge nur aus gecachten GPT-Antworten, keine OpenAI-Aufrufe')
+    parser.add_argument('--batch', action='store_true', help='Alle neuen Einträge gesammelt über die OpenAI-Batch-API generieren (langsamer, günstiger)')
+    parser.add_argument('--site', default=None, help='replay: Zielseite aus WP_SITES_FILE (Standard: die erste)')
+    parser.add_argument('--status', default='draft', choices=['draft', 'pending', 'private', 'publish'],
+                        help='replay: Status der neu angelegten Beiträge (Standard: draft)')
+    parser.add_argument('--limit', type=int, default=0, help='replay: höchstens so viele Antworten, neueste zuerst (0 = alle)')
     args = parser.parse_args()
-    main(max_entries=args.max)
+    if args.command == 'stats':
+        show_stats()
+        raise SystemExit(0)
+    setup_logging()
+    if args.command == 'check-feeds':
+        raise SystemExit(1 if check_feeds(feed_concurrency=args.feed_concurrency) else 0)
+    elif args.command == 'dry-run':
+        dry_run(max_entries=args.max, feed_concurrency=args.feed_concurrency)
+    elif args.command == 'daemon':
+        daemon(max_entries=args.max, feed_concurrency=args.feed_concurrency, sequential=args.sequential)
+    elif args.command == 'replay':
+        replay_cache(site_name=args.site, status=args.status, limit=args.limit)
+    elif args.command == 'fetch':
+        fetch(max_entries=args.max, feed_concurrency=args.feed_concurrency)
+    elif args.command == 'publish':
+        publish(sequential=args.sequential, replay=args.replay, use_batch=args.batch)
+    else:
+        main(max_entries=args.max, feed_concurrency=args.feed_concurrency, sequential=args.sequential,
+             replay=args.replay, use_batch=args.batch)
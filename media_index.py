@@ -0,0 +1,130 @@
+import argparse
+import logging
+import re
+import time
+
+import http_client
+from config import DB_PATH, WP_URL, WP_USER, WP_APP_PASSWORD
+from storage import get_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_index (
+    id INTEGER PRIMARY KEY,
+    media_id INTEGER NOT NULL,
+    pixabay_id INTEGER,
+    page_url TEXT,
+    content_hash TEXT,
+    source_url TEXT,
+    created_at INTEGER NOT NULL,
+    UNIQUE (media_id, page_url)
+);
+CREATE INDEX IF NOT EXISTS media_index_media ON media_index (media_id);
+CREATE INDEX IF NOT EXISTS media_index_pixabay ON media_index (pixabay_id);
+CREATE INDEX IF NOT EXISTS media_index_page ON media_index (page_url);
+CREATE INDEX IF NOT EXISTS media_index_hash ON media_index (content_hash);
+"""
+
+# Pixabay-Seiten enden auf "-<ID>/", z.B. https://pixabay.com/photos/laptop-computer-1483974/
+_PIXABAY_ID = re.compile(r"-(\d+)/?$")
+_PIXABAY_PAGE = re.compile(r"https?://pixabay\.com/\S+?-\d+/?(?=[\s\"'<]|$)")
+
+
+def pixabay_id_from_url(page_url):
+    match = _PIXABAY_ID.search((page_url or "").split("?")[0])
+    return int(match.group(1)) if match else None
+
+
+class MediaIndex:
+    # Pixabay-Bild (ID/pageURL/Inhalts-Hash) -> schon hochgeladene WordPress-Medien-ID
+    def __init__(self, path=DB_PATH, url=WP_URL, auth=(WP_USER, WP_APP_PASSWORD)):
+        self.db = get_db(path)
+        self.db.executescript(SCHEMA)
+        self.url = url
+        self.auth = auth
+
+    def find(self, page_url=None, pixabay_id=None):
+        pixabay_id = pixabay_id or pixabay_id_from_url(page_url)
+        if pixabay_id:
+            rows = self.db.execute(
+                "SELECT media_id FROM media_index WHERE pixabay_id = ? ORDER BY created_at DESC LIMIT 1",
+                (pixabay_id,),
+            )
+            if rows:
+                return rows[0][0]
+        if page_url:
+            rows = self.db.execute(
+                "SELECT media_id FROM media_index WHERE page_url = ? ORDER BY created_at DESC LIMIT 1",
+                (page_url,),
+            )
+            if rows:
+                return rows[0][0]
+        return None
+
+    def find_hash(self, content_hash):
+        if not content_hash:
+            return None
+        rows = self.db.execute(
+            "SELECT media_id FROM media_index WHERE content_hash = ? ORDER BY created_at DESC LIMIT 1",
+            (content_hash,),
+        )
+        return rows[0][0] if rows else None
+
+    def record(self, media_id, page_url=None, content_hash=None, source_url=None, pixabay_id=None):
+        self.db.execute(
+            "INSERT OR REPLACE INTO media_index "
+            "(media_id, pixabay_id, page_url, content_hash, source_url, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (media_id, pixabay_id or pixabay_id_from_url(page_url), page_url, content_hash,
+             source_url, int(time.time())),
+        )
+
+    def forget(self, media_id):
+        self.db.execute("DELETE FROM media_index WHERE media_id = ?", (media_id,))
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM media_index")[0][0]
+
+    def rebuild_from_wp(self, per_page=100):
+        # Liest die Mediathek seitenweise und übernimmt alle Bilder, deren
+        # Alt-Text auf eine Pixabay-Seite verweist ("Bildquelle: <pageURL>")
+        page, found = 1, 0
+        while True:
+            response = http_client.get(
+                f"{self.url}/wp-json/wp/v2/media",
+                endpoint="wp",
+                params={"per_page": per_page, "page": page, "media_type": "image",
+                        "_fields": "id,alt_text,source_url"},
+                auth=self.auth,
+            )
+            if response.status_code == 400 and page > 1:
+                break  # WP meldet 400, wenn die Seite hinter dem Ende liegt
+            response.raise_for_status()
+            items = response.json()
+            for media in items:
+                match = _PIXABAY_PAGE.search(media.get("alt_text") or "")
+                if not match:
+                    continue
+                page_url = match.group(0)
+                if self.find(page_url=page_url) is None:
+                    self.record(media["id"], page_url=page_url, source_url=media.get("source_url"))
+                    found += 1
+            total_pages = int(response.headers.get("X-WP-TotalPages", page))
+            if not items or page >= total_pages:
+                break
+            page += 1
+        logging.info(f"Medien-Index: {found} Pixabay-Bilder aus WordPress übernommen ({self.count()} gesamt).")
+        return found
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Index Pixabay-Bild -> WordPress-Medien-ID")
+    parser.add_argument('--rebuild', action='store_true', help='Index aus der WordPress-Mediathek (neu) aufbauen')
+    parser.add_argument('--site', help='Zielseite aus WP_SITES_FILE (Standard: die erste)')
+    args = parser.parse_args()
+    import sites
+    index = sites.get_site(args.site).media_index
+    if args.rebuild:
+        index.rebuild_from_wp()
+    else:
+        print(f"Medien-Index: {index.count()} Einträge")
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PREFIX = "newsbot"
+# Obergrenzen der Histogramm-Eimer in Sekunden
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Eimer für Token-Zahlen (mit set_buckets pro Histogramm wählen)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+# Für Quantile im JSON-Report werden die letzten so vielen Einzelwerte pro Histogramm
+# behalten (gleitendes Fenster, damit die Quantile im Daemon aktuell bleiben)
+MAX_SAMPLES = 10000
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = {}
+_bucket_bounds = {}
+_started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, n=1, **labels):
+    if not n:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+def set_buckets(name, bounds):
+    # Andere Eimer als BUCKETS für ein Histogramm, z.B. TOKEN_BUCKETS; vor dem ersten observe aufrufen
+    _bucket_bounds[name] = tuple(bounds)
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            bounds = _bucket_bounds.get(name, BUCKETS)
+            h = _histograms[key] = {
+                "count": 0, "sum": 0.0, "bounds": bounds, "buckets": [0] * len(bounds),
+                "samples": deque(maxlen=MAX_SAMPLES),
+            }
+        h["count"] += 1
+        h["sum"] += value
+        for i, bound in enumerate(h["bounds"]):
+            if value <= bound:
+                h["buckets"][i] += 1
+        h["samples"].append(value)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - start, **labels)
+
+
+def register(name, func):
+    # func() liefert ein Dict mit Zahlen (oder Dicts mit Zahlen) und wird beim Export abgefragt
+    _collectors[name] = func
+
+
+def quantile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _label_str(labels):
+    return ",".join(f"{k}={v}" for k, v in labels) or "-"
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: dict(h, samples=list(h["samples"])) for key, h in _histograms.items()}
+    report = {
+        "started_at": _started,
+        "uptime": round(time.time() - _started, 3),
+        "counters": {},
+        "histograms": {},
+    }
+    for (name, labels), value in sorted(counters.items()):
+        report["counters"].setdefault(name, {})[_label_str(labels)] = value
+    for (name, labels), h in sorted(histograms.items()):
+        samples = h["samples"]
+        report["histograms"].setdefault(name, {})[_label_str(labels)] = {
+            "count": h["count"],
+            "sum": round(h["sum"], 4),
+            "p50": quantile(samples, 0.5),
+            "p90": quantile(samples, 0.9),
+            "p99": quantile(samples, 0.99),
+            "max": max(samples) if samples else None,
+        }
+    for name, func in _collectors.items():
+        try:
+            report[name] = func()
+        except Exception as e:
+            logging.warning(f"Metriken '{name}' nicht verfügbar: {e}")
+    return report
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def prometheus_text():
+    # Text-Format für Prometheus (Endpoint oder Datei für den Node-Exporter)
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, dict(h, buckets=list(h["buckets"]))) for key, h in _histograms.items())
+    for (name, labels), value in counters:
+        lines.append(f"{PREFIX}_{name}_total{_fmt_labels(labels)} {value}")
+    for (name, labels), h in histograms:
+        for bound, count in zip(h["bounds"], h["buckets"]):
+            lines.append(f"{PREFIX}_{name}_bucket{_fmt_labels(labels + (('le', bound),))} {count}")
+        lines.append(f"{PREFIX}_{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {h['count']}")
+        lines.append(f"{PREFIX}_{name}_sum{_fmt_labels(labels)} {h['sum']}")
+        lines.append(f"{PREFIX}_{name}_count{_fmt_labels(labels)} {h['count']}")
+    for collector, func in sorted(_collectors.items()):
+        try:
+            values = func()
+        except Exception:
+            continue
+        for key, value in sorted(values.items()):
+            if isinstance(value, dict):
+                # Verschachtelt (z.B. pro Dienst) -> Label
+                for field, v in sorted(value.items()):
+                    if isinstance(v, (int, float)):
+                        lines.append(f'{PREFIX}_{collector}_{field}{{key="{key}"}} {v}')
+            elif isinstance(value, (int, float)):
+                lines.append(f"{PREFIX}_{collector}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_report(path, **extra):
+    report = snapshot()
+    report.update(extra)
+    _write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    return report
+
+
+def write_prometheus(path):
+    _write_atomic(path, prometheus_text())
+
+
+def serve(port, host="0.0.0.0"):
+    # http.server nur laden, wenn der Endpoint wirklich gebraucht wird
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            data = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Metriken unter http://{host}:{server.server_address[1]}/metrics")
+    return server
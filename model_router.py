@@ -0,0 +1,91 @@
+import logging
+
+import metrics
+import prompt_builder
+from config import OPENAI_MODEL, OPENAI_PRICES, OPENAI_SMALL_MODEL, ROUTER_MIN_SCORE, ROUTER_SHORT_CHARS
+
+# Gecachte Eingabe-Tokens kosten bei OpenAI die Hälfte
+CACHED_INPUT_DISCOUNT = 0.5
+# Anfragen über die Batch-API ebenfalls (Eingabe und Ausgabe)
+BATCH_DISCOUNT = 0.5
+
+
+def parse_prices(spec):
+    # "gpt-4o=2.5/10,gpt-4o-mini=0.15/0.6" -> {Modell: (Input, Output)} in USD pro 1 Mio. Tokens
+    prices = {}
+    for part in (spec or "").split(","):
+        model, _, price = part.partition("=")
+        input_price, _, output_price = price.partition("/")
+        try:
+            prices[model.strip()] = (float(input_price), float(output_price or input_price))
+        except ValueError:
+            if part.strip():
+                logging.warning(f"Ungültiger Preis in OPENAI_PRICES: {part}")
+    return prices
+
+
+PRICES = parse_prices(OPENAI_PRICES)
+
+
+def price_for(model):
+    # Längster passender Präfix, damit z.B. "gpt-4o-mini-2024-07-18" den Mini-Preis bekommt
+    matches = [name for name in PRICES if model.startswith(name)]
+    return PRICES[max(matches, key=len)] if matches else None
+
+
+def cost(model, prompt_tokens, completion_tokens, cached_tokens=0, batch=False):
+    price = price_for(model)
+    if price is None:
+        return 0.0
+    input_price, output_price = price
+    uncached = max(0, prompt_tokens - cached_tokens)
+    total = (
+        uncached * input_price
+        + cached_tokens * input_price * CACHED_INPUT_DISCOUNT
+        + completion_tokens * output_price
+    ) / 1_000_000
+    return total * BATCH_DISCOUNT if batch else total
+
+
+def choose_model(item):
+    # Kurze oder wenig relevante Einträge an das kleine, schnelle Modell;
+    # das große bleibt für längere Meldungen
+    if not OPENAI_SMALL_MODEL:
+        return OPENAI_MODEL
+    if len(prompt_builder.clean_summary(item.get("summary", ""))) < ROUTER_SHORT_CHARS:
+        return OPENAI_SMALL_MODEL
+    score = item.get("score")
+    if score is not None and score < ROUTER_MIN_SCORE:
+        return OPENAI_SMALL_MODEL
+    return OPENAI_MODEL
+
+
+def _model_of(label):
+    # Label-String aus metrics.snapshot(), z.B. "model=gpt-4o,type=prompt"
+    return dict(part.split("=", 1) for part in label.split(",") if "=" in part).get("model")
+
+
+def model_stats():
+    snapshot = metrics.snapshot()
+    stats = {}
+    for label, h in snapshot["histograms"].get("openai_seconds", {}).items():
+        stats.setdefault(_model_of(label), {})["latency"] = h
+    for label, value in snapshot["counters"].get("openai_cost_usd", {}).items():
+        stats.setdefault(_model_of(label), {})["cost"] = value
+    for label, value in snapshot["counters"].get("openai_tokens", {}).items():
+        token_type = dict(part.split("=", 1) for part in label.split(",")).get("type")
+        stats.setdefault(_model_of(label), {}).setdefault("tokens", {})[token_type] = value
+    return stats
+
+
+def log_model_stats():
+    for model, s in sorted(model_stats().items(), key=lambda m: str(m[0])):
+        latency = s.get("latency") or {}
+        tokens = s.get("tokens") or {}
+        p50 = latency.get("p50")
+        logging.info(
+            f"Modell {model}: {latency.get('count', 0)} Aufrufe, "
+            f"p50 {'-' if p50 is None else f'{p50:.2f}s'}, "
+            f"{tokens.get('prompt', 0)}/{tokens.get('completion', 0)} Tokens (In/Out), "
+            f"ca. {s.get('cost', 0):.4f} USD"
+        )
@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import logging
+import random
+import re
+import statistics
+import time
+
+from config import DB_PATH, NEAR_DUP_MAX_DISTANCE
+from storage import Database, get_db
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+MAX_TEXT = 4000
+# Einzelwörter sind robuster gegen Umstellungen als Wort-Trigramme (siehe --bench)
+SHINGLE_SIZE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS near_dup (
+    id INTEGER PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    b0 INTEGER NOT NULL,
+    b1 INTEGER NOT NULL,
+    b2 INTEGER NOT NULL,
+    b3 INTEGER NOT NULL,
+    title TEXT,
+    text TEXT,
+    link TEXT,
+    added_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS near_dup_b0 ON near_dup (b0);
+CREATE INDEX IF NOT EXISTS near_dup_b1 ON near_dup (b1);
+CREATE INDEX IF NOT EXISTS near_dup_b2 ON near_dup (b2);
+CREATE INDEX IF NOT EXISTS near_dup_b3 ON near_dup (b3);
+"""
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return words
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text):
+    weights = [0] * BITS
+    for shingle in shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            if h >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def bands(h):
+    mask = (1 << BAND_BITS) - 1
+    return [(h >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def _to_signed(h):
+    # SQLite-INTEGER ist vorzeichenbehaftet
+    return h - (1 << BITS) if h >= 1 << (BITS - 1) else h
+
+
+def _to_unsigned(h):
+    return h + (1 << BITS) if h < 0 else h
+
+
+def entry_text(title, summary):
+    return f"{title}\n{summary}"
+
+
+class NearDupIndex:
+    # SimHash über Wort-Shingles aus Titel + Summary. Gesucht wird nur in
+    # Kandidaten, die in mindestens einem 16-Bit-Band exakt übereinstimmen;
+    # bei max. Abstand <= 3 findet das garantiert jeden Treffer (Schubfachprinzip).
+    def __init__(self, path=DB_PATH, max_distance=NEAR_DUP_MAX_DISTANCE, db=None):
+        self.db = db or get_db(path)
+        self.db.executescript(SCHEMA)
+        self.max_distance = max_distance
+
+    def find_hash(self, h, max_distance=None):
+        max_distance = self.max_distance if max_distance is None else max_distance
+        b = bands(h)
+        rows = self.db.execute(
+            "SELECT id, simhash, title, link FROM near_dup "
+            "WHERE b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?",
+            tuple(b),
+        )
+        best = None
+        for row_id, stored, title, link in rows:
+            distance = hamming(h, _to_unsigned(stored))
+            if distance <= max_distance and (best is None or distance < best["distance"]):
+                best = {"id": row_id, "title": title, "link": link, "distance": distance}
+        return best
+
+    def find(self, title, summary, max_distance=None):
+        return self.find_hash(simhash(entry_text(title, summary)), max_distance)
+
+    def add(self, title, summary, link=None, h=None):
+        if h is None:
+            h = simhash(entry_text(title, summary))
+        self.db.execute(
+            "INSERT INTO near_dup (simhash, b0, b1, b2, b3, title, text, link, added_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (_to_signed(h), *bands(h), title, summary[:MAX_TEXT], link, int(time.time())),
+        )
+        return h
+
+    def corpus(self):
+        return self.db.execute("SELECT title, text FROM near_dup ORDER BY id")
+
+    def prune(self, max_age_days):
+        if not max_age_days or max_age_days <= 0:
+            return 0
+        cutoff = int(time.time() - max_age_days * 86400)
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM near_dup WHERE added_at < ?", (cutoff,)).rowcount
+
+
+def _perturb(text, rng, rate=0.1):
+    # Simuliert eine leicht umformulierte Syndizierung: Wörter fallen weg / werden getauscht
+    words = text.split()
+    out = [w for w in words if rng.random() > rate / 2]
+    for _ in range(max(1, int(len(out) * rate / 2))):
+        if len(out) > 2:
+            i = rng.randrange(len(out) - 1)
+            out[i], out[i + 1] = out[i + 1], out[i]
+    return " ".join(out)
+
+
+def benchmark(path=DB_PATH, max_distance=NEAR_DUP_MAX_DISTANCE, samples=500, rate=0.1, seed=42):
+    corpus = [(t or "", x or "") for t, x in NearDupIndex(path).corpus()]
+    if len(corpus) < 4:
+        print("Zu wenige gespeicherte Einträge für einen Benchmark.")
+        return None
+    rng = random.Random(seed)
+    rng.shuffle(corpus)
+    # Hälfte indizieren, andere Hälfte als echte Nicht-Duplikate abfragen
+    half = len(corpus) // 2
+    indexed, held_out = corpus[:half], corpus[half:]
+    index = NearDupIndex(max_distance=max_distance, db=Database(":memory:"))
+    ids = []
+    for title, text in indexed:
+        index.add(title, text)
+        ids.append(index.db.execute("SELECT MAX(id) FROM near_dup")[0][0])
+
+    latencies = []
+    tp = fp = fn = 0
+    positives = rng.sample(range(len(indexed)), min(samples, len(indexed)))
+    for i in positives:
+        title, text = indexed[i]
+        start = time.perf_counter()
+        match = index.find(title, _perturb(text, rng, rate))
+        latencies.append(time.perf_counter() - start)
+        if match and match["id"] == ids[i]:
+            tp += 1
+        else:
+            fn += 1
+            if match:
+                fp += 1
+    for title, text in held_out[:samples]:
+        start = time.perf_counter()
+        match = index.find(title, text)
+        latencies.append(time.perf_counter() - start)
+        if match:
+            fp += 1
+
+    latencies.sort()
+    result = {
+        "indexed": len(indexed),
+        "queries": len(latencies),
+        "max_distance": max_distance,
+        "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+        "lookup_ms_p50": round(statistics.median(latencies) * 1000, 3),
+        "lookup_ms_p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+    print(
+        f"[Near-Dup-Benchmark] Index: {result['indexed']} | Abfragen: {result['queries']} | "
+        f"Abstand <= {max_distance} | Precision: {result['precision']} | Recall: {result['recall']} | "
+        f"Lookup p50: {result['lookup_ms_p50']}ms p99: {result['lookup_ms_p99']}ms"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Near-Duplicate-Index (SimHash)")
+    parser.add_argument('--bench', action='store_true', help='Precision/Recall/Latenz auf den gespeicherten Einträgen messen')
+    parser.add_argument('--max-distance', type=int, default=NEAR_DUP_MAX_DISTANCE, help='Max. Hamming-Abstand (von 64 Bit)')
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=0.1, help='Anteil veränderter Wörter bei den Test-Duplikaten')
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(max_distance=args.max_distance, samples=args.samples, rate=args.rate)
+    else:
+        parser.print_help()
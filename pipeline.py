@@ -0,0 +1,54 @@
+import logging
+import queue
+import threading
+
+_DONE = object()
+
+
+def _worker(name, func, inbox, outbox):
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            return
+        try:
+            result = func(item)
+        except Exception as e:
+            logging.error(f"Fehler in Stufe '{name}': {e}")
+            continue
+        if result is not None and outbox is not None:
+            outbox.put(result)
+
+
+def run_pipeline(source, stages, queue_size=20):
+    # source: Iterable mit Start-Items
+    # stages: Liste von (Name, Funktion, Anzahl Worker). Gibt eine Funktion None
+    # zurück, fällt das Item aus der Kette.
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    groups = []
+    for i, (name, func, workers) in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        threads = [
+            threading.Thread(
+                target=_worker, args=(name, func, queues[i], outbox),
+                name=f"{name}-{n}", daemon=True,
+            )
+            for n in range(max(1, workers))
+        ]
+        for t in threads:
+            t.start()
+        groups.append(threads)
+
+    count = 0
+    for item in source:
+        queues[0].put(item)
+        count += 1
+
+    # Stufe für Stufe herunterfahren: erst wenn alle Worker einer Stufe fertig
+    # sind, bekommt die nächste ihr Ende-Signal
+    for i, threads in enumerate(groups):
+        for _ in threads:
+            queues[i].put(_DONE)
+        for t in threads:
+            t.join()
+    logging.info(f"Pipeline beendet: {count} Einträge eingespeist.")
+    return count
@@ -0,0 +1,160 @@
+import html
+import logging
+import os
+import re
+import threading
+from html.parser import HTMLParser
+
+from config import OPENAI_MODEL, PROMPT_FILE, PROMPT_MAX_INPUT_TOKENS
+
+PERSONA = "Du bist ein moderner, deutschsprachiger Tech-Redakteur."
+
+# Wird benutzt, wenn prompt.txt fehlt. Platzhalter: {original_title}, {text}
+DEFAULT_TEMPLATE = (
+    "Übersetze den folgenden englischen Titel ins Deutsche, aber lasse Eigennamen, Marken, Produktnamen und Eventtitel (wie 'Snowflake Summit') IMMER im Original stehen.\n"
+    "Gib ausschließlich den so übersetzten deutschen Titel als erste Zeile aus: '{original_title}'.\n"
+    "Darunter schreibe einen ausführlichen, modernen, sachlichen News-Text auf Deutsch (mindestens 300 Wörter), suchmaschinenoptimiert, für technikaffine Männer zwischen 24 und 40 Jahren.\n"
+    "Baue ein aussagekräftiges SEO-Schlagwort sinnvoll mehrfach in den Text ein.\n"
+    "Absätze bitte durch Leerzeilen trennen.\n"
+    "Am Ende ANTWORTE NUR mit [Kategorie: <Name>] (eine aus: Gaming, IT, Mobile, Creator) und darunter [Schlagwort: <Keyword>].\n"
+    "KEINE weiteren Erklärungen oder Zusatzinfos!\n"
+    "Gib NUR den deutschen Titel (ohne Sternchen, Anführungszeichen oder andere Sonderzeichen am Anfang/Ende), darunter den Fließtext, dann Kategorie und Schlagwort zurück.\n"
+    "\n"
+    "{text}"
+)
+
+# Im JSON-Modus ersetzt das Schema die Formatvorgaben der Vorlage
+JSON_INSTRUCTIONS = (
+    "Antworte ausschließlich als JSON-Objekt: title = deutscher Titel, paragraphs = Absätze des "
+    "Fließtexts, category = Kategorie, keyword = SEO-Schlagwort. Die Marker [Kategorie: ...] und "
+    "[Schlagwort: ...] entfallen."
+)
+
+# Typische Anhängsel von Feed-Beschreibungen ohne Informationswert
+BOILERPLATE = [
+    re.compile(r"The post .{0,300}? appeared first on .{0,200}?\.?$", re.IGNORECASE | re.DOTALL),
+    re.compile(r"\b(continue reading|read more|weiterlesen|mehr lesen)\b[^.!?]{0,80}$", re.IGNORECASE),
+    re.compile(r"\[(…|\.\.\.|&#8230;)\]\s*$"),
+    re.compile(r"\b(this article|the article) (was )?originally (appeared|published) .*$", re.IGNORECASE | re.DOTALL),
+]
+
+_template = None
+_template_lock = threading.Lock()
+_encoding = False  # False = noch nicht versucht, None = kein tiktoken
+
+
+class _TextExtractor(HTMLParser):
+    SKIP = {"script", "style", "noscript", "iframe"}
+    BLOCK = {"p", "br", "div", "li", "h1", "h2", "h3", "h4", "blockquote", "tr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def strip_html(text):
+    if "<" not in (text or ""):
+        return html.unescape(text or "")
+    parser = _TextExtractor()
+    parser.feed(text)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def clean_summary(text):
+    text = strip_html(text)
+    paragraphs, seen = [], set()
+    for para in re.split(r"\n\s*\n|\n", text):
+        para = re.sub(r"\s+", " ", para).strip()
+        for pattern in BOILERPLATE:
+            para = pattern.sub("", para).strip()
+        if para and para.lower() not in seen:
+            seen.add(para.lower())
+            paragraphs.append(para)
+    return "\n\n".join(paragraphs)
+
+
+def _tokenizer():
+    # tiktoken ist optional; ohne gilt die Faustregel 4 Zeichen pro Token
+    global _encoding
+    if _encoding is False:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _tokenizer()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text, max_tokens=PROMPT_MAX_INPUT_TOKENS):
+    if not max_tokens or max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+    encoding = _tokenizer()
+    if encoding is None:
+        cut = text[:max_tokens * 4]
+    else:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+    # Am letzten Satzende abschneiden, wenn das nicht zu viel verschenkt
+    end = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind("! "), cut.rfind("? "))
+    if end > len(cut) * 0.6:
+        cut = cut[:end + 1]
+    return cut.rstrip() + " …"
+
+
+def load_template(path=PROMPT_FILE):
+    # Vorlage einmal laden und aufteilen: Zeilen ohne Platzhalter bilden den festen
+    # System-Prompt (gleichbleibender Präfix -> Prompt-Caching beim Anbieter),
+    # Zeilen mit {original_title}/{text} die Nutzer-Nachricht pro Eintrag
+    global _template
+    with _template_lock:
+        if _template is None:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    raw = f.read()
+            else:
+                logging.info(f"Prompt-Vorlage '{path}' nicht gefunden, verwende die eingebaute.")
+                raw = DEFAULT_TEMPLATE
+            fixed, variable = [], []
+            for line in raw.strip().splitlines():
+                (variable if "{original_title}" in line or "{text}" in line else fixed).append(line)
+            system = "\n".join([PERSONA, ""] + [l for l in fixed if l.strip()])
+            _template = (system, "\n\n".join(variable))
+        return _template
+
+
+def system_prompt(json_mode=False):
+    if json_mode:
+        return f"{load_template()[0]}\n{JSON_INSTRUCTIONS}"
+    return load_template()[0]
+
+
+def user_prompt(title, summary, max_tokens=PROMPT_MAX_INPUT_TOKENS):
+    text = truncate_tokens(clean_summary(summary), max_tokens)
+    return load_template()[1].format(original_title=title, text=text)
@@ -0,0 +1,171 @@
+import logging
+import re
+import threading
+import time
+
+from config import (
+    OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE,
+    PIXABAY_REQUESTS_PER_MINUTE, WP_WRITES_PER_MINUTE, WP_WRITE_BURST,
+)
+
+# Dienst -> (Limit pro Zeitraum, Zeitraum in Sekunden, Burst). Limit 0 = unbegrenzt,
+# bis der Dienst selbst eine Grenze per Header meldet.
+LIMITS = {
+    "openai": (OPENAI_REQUESTS_PER_MINUTE, 60, None),
+    "openai_tokens": (OPENAI_TOKENS_PER_MINUTE, 60, None),
+    "pixabay": (PIXABAY_REQUESTS_PER_MINUTE, 60, None),
+    "wp": (WP_WRITES_PER_MINUTE, 60, WP_WRITE_BURST),
+}
+
+# Dienst -> {Bucket: (Limit-, Rest-, Reset-Header)}
+HEADERS = {
+    "openai": {
+        "openai": ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        "openai_tokens": ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+    },
+}
+DEFAULT_HEADERS = ("X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    # "20", "1.5s", "120ms", "6m0s" -> Sekunden
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _UNITS[unit] for n, unit in parts)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    # Füllt sich gleichmäßig mit limit/period Token pro Sekunde bis zur Kapazität.
+    # Ohne Limit lässt der Bucket alles durch, bis observe() eines liefert.
+    def __init__(self, name, limit=0, period=60, burst=None):
+        self.name = name
+        self.period = period
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self.stats = {"acquired": 0, "waits": 0, "wait_total": 0.0, "wait_max": 0.0}
+        self._configure(limit, burst)
+        self.tokens = self.capacity
+
+    def _configure(self, limit, burst=None):
+        self.limit = limit if limit and limit > 0 else 0
+        self.rate = self.limit / self.period if self.limit else None
+        self.capacity = max(1.0, burst if burst else self.limit)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost=1):
+        # Reserviert sofort und schläft danach außerhalb des Locks; so bekommen
+        # parallele Threads nacheinander ihre Slots statt gemeinsam loszulaufen
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._blocked_until - now)
+            if self.rate:
+                cost = min(cost, self.capacity)
+                self.tokens -= cost
+                if self.tokens < 0:
+                    delay = max(delay, -self.tokens / self.rate)
+            self.stats["acquired"] += 1
+            if delay > 0:
+                self.stats["waits"] += 1
+                self.stats["wait_total"] += delay
+                self.stats["wait_max"] = max(self.stats["wait_max"], delay)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def observe(self, limit=None, remaining=None, reset=None):
+        # Angaben des Dienstes übernehmen: neues Limit, nie mehr Token als der
+        # Server noch erlaubt, bei 0 bis zum Reset sperren
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit and limit != self.limit:
+                burst = self.capacity if self.limit and self.capacity < self.limit else None
+                logging.info(f"Rate-Limit {self.name}: {int(limit)} pro {self.period}s (laut Dienst)")
+                unlimited = not self.limit
+                self._configure(limit, burst)
+                # Bisher unbegrenzt: mit vollem Bucket starten, den Rest regelt remaining
+                self.tokens = self.capacity if unlimited else min(self.tokens, self.capacity)
+            if remaining is not None and self.rate:
+                self.tokens = min(self.tokens, remaining)
+            if remaining is not None and remaining <= 0 and reset:
+                self._blocked_until = max(self._blocked_until, now + reset)
+
+    def pause(self, seconds):
+        # z.B. nach HTTP 429 mit Retry-After
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(service):
+    with _buckets_lock:
+        if service not in _buckets:
+            # "wp:<Seite>" -> eigener Bucket pro WordPress-Ziel mit den Grenzen von "wp"
+            limit, period, burst = LIMITS.get(service) or LIMITS.get(service.split(":")[0], (0, 60, None))
+            _buckets[service] = TokenBucket(service, limit, period, burst)
+        return _buckets[service]
+
+
+def acquire(service, cost=1):
+    return bucket(service).acquire(cost)
+
+
+def pause(service, seconds):
+    if seconds and seconds > 0:
+        bucket(service).pause(seconds)
+
+
+def observe_headers(service, headers):
+    for name, (limit_h, remaining_h, reset_h) in HEADERS.get(service, {service: DEFAULT_HEADERS}).items():
+        limit, remaining = _number(headers.get(limit_h)), _number(headers.get(remaining_h))
+        if limit is None and remaining is None:
+            continue
+        bucket(name).observe(limit, remaining, parse_duration(headers.get(reset_h)))
+
+
+def stats():
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    result = {}
+    for b in buckets:
+        with b._lock:
+            result[b.name] = dict(b.stats, limit=b.limit)
+    return result
+
+
+def log_stats():
+    for name, s in sorted(stats().items()):
+        if not s["acquired"]:
+            continue
+        logging.info(
+            f"Rate-Limit {name}: {s['acquired']} Aufrufe, {s['waits']}x gewartet "
+            f"({s['wait_total']:.1f}s gesamt, max {s['wait_max']:.1f}s)"
+        )
@@ -0,0 +1,115 @@
+import calendar
+import logging
+import math
+import re
+import time
+
+import prompt_builder
+from config import (
+    OPENAI_MAX_TOKENS, OPENAI_OUTPUT_MODE, RELEVANCE_HALF_LIFE_HOURS, RELEVANCE_KEYWORDS,
+    RELEVANCE_MAX_AGE_HOURS, RUN_MAX_ENTRIES, RUN_MAX_TOKENS,
+)
+
+# Ohne Datum gilt ein Eintrag als mittelaktuell
+UNKNOWN_RECENCY = 0.5
+
+
+def parse_keywords(spec):
+    # "KI=2, iPhone=1.5, Nintendo" -> {"ki": 2.0, "iphone": 1.5, "nintendo": 1.0}
+    keywords = {}
+    for part in (spec or "").split(","):
+        word, _, weight = part.partition("=")
+        word = word.strip().lower()
+        if word:
+            try:
+                keywords[word] = float(weight) if weight.strip() else 1.0
+            except ValueError:
+                logging.warning(f"Ungültiges Gewicht für Schlagwort '{word}': {weight}")
+    return keywords
+
+
+_keywords = None
+
+
+def default_keywords():
+    # Erst beim ersten Gebrauch parsen, damit beim Import noch nichts geloggt wird
+    global _keywords
+    if _keywords is None:
+        _keywords = parse_keywords(RELEVANCE_KEYWORDS)
+    return _keywords
+
+
+def entry_age_hours(entry, now=None):
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed:
+        return None
+    return max(0.0, ((now or time.time()) - calendar.timegm(parsed)) / 3600)
+
+
+def recency_score(age_hours, half_life=RELEVANCE_HALF_LIFE_HOURS):
+    if age_hours is None:
+        return UNKNOWN_RECENCY
+    return math.pow(0.5, age_hours / half_life) if half_life > 0 else 1.0
+
+
+def keyword_score(text, keywords=None):
+    keywords = default_keywords() if keywords is None else keywords
+    if not keywords:
+        return 0.0
+    words = set(re.findall(r"\w+", (text or "").lower()))
+    return sum(weight for word, weight in keywords.items() if word in words)
+
+
+def score_entry(entry, weight=1.0, now=None, keywords=None):
+    text = f"{entry.get('title', '')} {entry.get('summary', '')}"
+    return weight * (recency_score(entry_age_hours(entry, now)) + keyword_score(text, keywords))
+
+
+def rank(candidates, feed_options=None, now=None):
+    # candidates: [(entry, feed_url)] aus allen Feeds -> nach Score absteigend,
+    # zu alte Einträge fallen raus
+    feed_options = feed_options or {}
+    now = now or time.time()
+    scored, too_old = [], 0
+    for entry, feed_url in candidates:
+        age = entry_age_hours(entry, now)
+        if RELEVANCE_MAX_AGE_HOURS > 0 and age is not None and age > RELEVANCE_MAX_AGE_HOURS:
+            too_old += 1
+            continue
+        weight = feed_options.get(feed_url, {}).get("weight", 1.0)
+        scored.append((score_entry(entry, weight, now), entry, feed_url))
+    scored.sort(key=lambda s: s[0], reverse=True)
+    if too_old:
+        logging.info(f"Relevanz: {too_old} Einträge älter als {RELEVANCE_MAX_AGE_HOURS}h übersprungen.")
+    return scored
+
+
+def estimate_tokens(item):
+    # Wie llm.generate gegen das Token-Limit rechnet: System- und User-Prompt (bereinigt
+    # und gekürzt wie beim echten Aufruf) plus maximale Antwortlänge
+    system = prompt_builder.system_prompt(OPENAI_OUTPUT_MODE == "json")
+    prompt = prompt_builder.user_prompt(item["title"], item["summary"])
+    return prompt_builder.count_tokens(system) + prompt_builder.count_tokens(prompt) + OPENAI_MAX_TOKENS
+
+
+class Budget:
+    # Obergrenze pro Lauf für neue Einträge bzw. geschätzte Tokens (0 = unbegrenzt)
+    def __init__(self, max_entries=RUN_MAX_ENTRIES, max_tokens=RUN_MAX_TOKENS):
+        self.max_entries = max_entries
+        self.max_tokens = max_tokens
+        self.entries = 0
+        self.tokens = 0
+
+    def exhausted(self):
+        return bool(
+            (self.max_entries and self.entries >= self.max_entries)
+            or (self.max_tokens and self.tokens >= self.max_tokens)
+        )
+
+    def take(self, item):
+        tokens = estimate_tokens(item)
+        if self.exhausted() or (self.max_tokens and self.tokens + tokens > self.max_tokens):
+            return False
+        self.entries += 1
+        self.tokens += tokens
+        return True
@@ -0,0 +1,106 @@
+import calendar
+import random
+import time
+
+from config import (
+    DB_PATH, SCHEDULER_DEFAULT_INTERVAL, SCHEDULER_MAX_INTERVAL, SCHEDULER_MIN_INTERVAL,
+)
+from storage import get_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_schedule (
+    url TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    next_due REAL NOT NULL,
+    rate REAL NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_fetch REAL,
+    last_published REAL
+);
+"""
+
+# Gewicht einer neuen Beobachtung für die geschätzte Veröffentlichungsrate
+RATE_ALPHA = 0.3
+# Feeds, die in so vielen Sekunden ohnehin fällig werden, gleich mit abrufen (ein Durchlauf statt vieler)
+DUE_WINDOW = 60
+
+
+def clamp(value, low=SCHEDULER_MIN_INTERVAL, high=SCHEDULER_MAX_INTERVAL):
+    return max(low, min(high, value))
+
+
+def entry_timestamp(entry):
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return calendar.timegm(parsed) if parsed else None
+
+
+class FeedScheduler:
+    # Jeder Feed hat sein eigenes Intervall. Es richtet sich nach der geschätzten
+    # Rate neuer Einträge (ca. ein neuer Eintrag pro Abruf), verlängert sich bei
+    # ruhigen Feeds von selbst und verdoppelt sich bei Fehlern.
+    def __init__(self, path=DB_PATH):
+        self.db = get_db(path)
+        self.db.executescript(SCHEMA)
+
+    def sync_feeds(self, feed_urls):
+        # Neue Feeds sofort fällig; sie kommen zusammen in einen Durchlauf (parallel abgerufen),
+        # danach verteilt der Jitter in record() sie über ihre Intervalle
+        now = time.time()
+        known = {row[0] for row in self.db.execute("SELECT url FROM feed_schedule")}
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO feed_schedule (url, interval, next_due) VALUES (?, ?, ?)",
+                [(url, SCHEDULER_DEFAULT_INTERVAL, now) for url in feed_urls if url not in known],
+            )
+            if feed_urls:
+                placeholders = ",".join("?" * len(feed_urls))
+                conn.execute(f"DELETE FROM feed_schedule WHERE url NOT IN ({placeholders})", tuple(feed_urls))
+
+    def due_feeds(self, now=None, window=DUE_WINDOW):
+        now = now or time.time()
+        return [row[0] for row in self.db.execute(
+            "SELECT url FROM feed_schedule WHERE next_due <= ? ORDER BY next_due", (now + window,)
+        )]
+
+    def next_due(self):
+        rows = self.db.execute("SELECT MIN(next_due) FROM feed_schedule")
+        return rows[0][0] if rows and rows[0][0] is not None else None
+
+    def record(self, url, feed=None, ok=True, now=None):
+        now = now or time.time()
+        rows = self.db.execute(
+            "SELECT interval, rate, failures, last_fetch, last_published FROM feed_schedule WHERE url = ?",
+            (url,),
+        )
+        if not rows:
+            return None
+        interval, rate, failures, last_fetch, last_published = rows[0]
+        if not ok:
+            failures += 1
+            interval = clamp(interval * 2)
+        else:
+            failures = 0
+            timestamps = [t for t in (entry_timestamp(e) for e in (feed.entries if feed else [])) if t]
+            if last_published is None:
+                # Erster Abruf: Rate aus den Abständen der Einträge im Feed schätzen
+                new = 0
+                if len(timestamps) >= 2:
+                    span = max(timestamps) - min(timestamps)
+                    if span > 0:
+                        rate = (len(timestamps) - 1) / span
+            else:
+                new = sum(1 for t in timestamps if t > last_published)
+                elapsed = max(1.0, now - (last_fetch or now - interval))
+                rate = RATE_ALPHA * (new / elapsed) + (1 - RATE_ALPHA) * rate
+            if timestamps:
+                last_published = max(timestamps + [last_published or 0])
+            interval = clamp(1 / rate) if rate > 0 else clamp(interval * 1.5)
+        # Etwas Jitter, damit Feeds mit gleichem Intervall nicht synchron laufen
+        next_due = now + interval * random.uniform(0.9, 1.1)
+        self.db.execute(
+            "UPDATE feed_schedule SET interval = ?, next_due = ?, rate = ?, failures = ?, "
+            "last_fetch = ?, last_published = ? WHERE url = ?",
+            (interval, next_due, rate, failures, now, last_published, url),
+        )
+        return interval
+
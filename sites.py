@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import threading
+
+from config import DB_PATH, KAT_IDS, WP_APP_PASSWORD, WP_SITES_FILE, WP_URL, WP_USER
+from dedup_store import DedupStore, open_dedup_store
+from media_index import MediaIndex
+from near_dup import NearDupIndex
+from storage import ReadOnlyDatabase
+from tag_cache import TagResolver
+
+# WordPress-Ziele. Jede generierte Meldung geht an alle Seiten, die sie noch nicht
+# haben. WP_SITES_FILE ist eine JSON-Liste, z.B.:
+#   [
+#     {"name": "niceeins", "url": "https://niceeins.de", "user": "bot",
+#      "app_password": "${NICEEINS_WP_APP_PASSWORD}"},
+#     {"name": "gaming", "url": "https://gaming.example", "user": "bot",
+#      "app_password": "${GAMING_WP_APP_PASSWORD}", "categories": {"Gaming": 7, "IT": 9}}
+#   ]
+# ${VAR} wird aus der Umgebung ersetzt. categories fehlt -> KAT_IDS. Jede Seite hat
+# ihre eigene Datenbank für Dedup, Medien und Tags ("db"); die erste Seite nutzt
+# standardmäßig DB_PATH und übernimmt damit den Zustand aus dem Einzelseiten-Betrieb.
+
+DEFAULT_SITE = "default"
+
+
+class Site:
+    def __init__(self, name, url, user, app_password, kat_ids=None, db_path=DB_PATH):
+        self.name = name
+        self.url = (url or "").rstrip("/")
+        self.auth = (user, app_password)
+        self.kat_ids = kat_ids or KAT_IDS
+        self.db_path = db_path
+        # Eigener Token-Bucket pro Seite, damit eine gedrosselte Seite die anderen nicht bremst
+        self.rate_key = "wp" if name == DEFAULT_SITE else f"wp:{name}"
+        # Die alten posted_*.txt gehören zur ursprünglichen Seite in DB_PATH
+        self.dedup = open_dedup_store(db_path) if db_path == DB_PATH else DedupStore(db_path)
+        self.near_dup = NearDupIndex(db_path)
+        self.media_index = MediaIndex(db_path, url=self.url, auth=self.auth)
+        self.tags = TagResolver(db_path, url=self.url, auth=self.auth, rate_key=self.rate_key)
+
+    def category_id(self, name, fallback=None):
+        # Unbekannte Kategorie -> Ersatz (z.B. Kategorie des Feeds) -> IT -> erste Kategorie der Seite
+        return (
+            self.kat_ids.get(name) or self.kat_ids.get(fallback) or self.kat_ids.get("IT")
+            or next(iter(self.kat_ids.values()))
+        )
+
+    def __repr__(self):
+        return f"Site({self.name!r}, {self.url!r})"
+
+
+class ReadOnlySite:
+    # Nur die Dedup-Abfragen einer Seite, ohne ihre Datenbank anzulegen oder zu ändern
+    # (Probelauf). Auch der einmalige Import der alten posted_*.txt bleibt aus.
+    def __init__(self, name, db_path=DB_PATH, **_):
+        self.name = name
+        self.db_path = db_path
+        db = ReadOnlyDatabase(db_path)
+        self.dedup = DedupStore(db=db)
+        self.near_dup = NearDupIndex(db=db)
+
+    def __repr__(self):
+        return f"ReadOnlySite({self.name!r})"
+
+
+def _site_db_path(name, first):
+    if first:
+        return DB_PATH
+    base, ext = os.path.splitext(DB_PATH)
+    return f"{base}-{name}{ext or '.db'}"
+
+
+def read_site_config(path=WP_SITES_FILE):
+    # -> Liste von Site-Argumenten (ohne Datenbanken zu öffnen)
+    if not path or not os.path.exists(path):
+        return [{
+            "name": DEFAULT_SITE, "url": WP_URL, "user": WP_USER, "app_password": WP_APP_PASSWORD,
+            "db_path": DB_PATH,
+        }]
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path} ist kein gültiges JSON: {e}")
+    if not isinstance(config, list) or not config:
+        raise ValueError(f"{path} muss eine nicht-leere Liste von Seiten enthalten.")
+    configs, names, db_paths = [], set(), set()
+    for i, entry in enumerate(config):
+        name = str(entry.get("name") or "").strip()
+        url = os.path.expandvars(entry.get("url") or "")
+        if not name or not url:
+            raise ValueError(f"{path}: Seite {i + 1} braucht name und url.")
+        db_path = entry.get("db") or _site_db_path(name, first=not configs)
+        if name in names or db_path in db_paths:
+            raise ValueError(f"{path}: Name bzw. Datenbank von '{name}' ist doppelt vergeben.")
+        names.add(name)
+        db_paths.add(db_path)
+        configs.append({
+            "name": name,
+            "url": url,
+            "user": os.path.expandvars(entry.get("user") or ""),
+            "app_password": os.path.expandvars(entry.get("app_password") or ""),
+            "kat_ids": entry.get("categories"),
+            "db_path": db_path,
+        })
+    return configs
+
+
+def load_sites(path=WP_SITES_FILE):
+    sites = [Site(**config) for config in read_site_config(path)]
+    if path and os.path.exists(path):
+        logging.info(f"{len(sites)} WordPress-Ziele: {', '.join(s.name for s in sites)}")
+    return sites
+
+
+def load_sites_read_only(path=WP_SITES_FILE):
+    return [ReadOnlySite(**config) for config in read_site_config(path)]
+
+
+_sites = None
+_sites_lock = threading.Lock()
+
+
+def get_sites():
+    global _sites
+    with _sites_lock:
+        if _sites is None:
+            _sites = load_sites()
+        return _sites
+
+
+def get_site(name=None):
+    # Ohne Namen die erste Seite
+    sites = get_sites()
+    if name is None:
+        return sites[0]
+    for site in sites:
+        if site.name == name:
+            return site
+    raise KeyError(f"Unbekannte Seite: {name}")
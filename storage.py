@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import DB_PATH
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+class Database:
+    # Eine SQLite-Verbindung pro Datei, von allen Threads über ein Lock geteilt
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executescript(self, script):
+        with self._lock:
+            self._conn.executescript(script)
+
+    @contextmanager
+    def transaction(self):
+        # Alles im Block wird gemeinsam geschrieben oder gar nicht
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def get_meta(self, key, default=None):
+        rows = self.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def set_meta(self, key, value):
+        self.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_db(path=DB_PATH):
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = Database(path)
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            _databases[path] = db
+        return db
+
+
+def open_read_only(path=DB_PATH):
+    # Für Auswertungen: legt weder Datei noch Tabellen an. None, wenn es die Datei nicht gibt.
+    if not os.path.exists(path):
+        return None
+    return sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+
+def read_rows(conn, sql, params=()):
+    # Fehlende Tabelle (Funktion noch nie benutzt) -> keine Zeilen
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+class ReadOnlyDatabase:
+    # Wie Database, aber nur lesend (Probelauf): Schema wird nicht angelegt, und fehlen
+    # Datei oder Tabelle, liefern Abfragen einfach keine Zeilen
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = open_read_only(path)
+
+    def execute(self, sql, params=()):
+        if self._conn is None:
+            return []
+        with self._lock:
+            return read_rows(self._conn, sql, params)
+
+    def executescript(self, script):
+        pass
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
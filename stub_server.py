@@ -0,0 +1,393 @@
+import argparse
+import email.parser
+import email.utils
+import hashlib
+import io
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Lokaler Stand-in für alle Dienste, die der Bot nutzt: OpenAI (Chat-Completions,
+# Files, Batches), RSS-Feeds, Pixabay, Bilder und die WordPress-REST-API.
+# Zum Testen ohne echte API-Kosten und ohne echte Beiträge:
+#   python stub_server.py --port 8800 --feeds 5
+#   OPENAI_BASE_URL=http://127.0.0.1:8800/v1 WP_URL=http://127.0.0.1:8800 \
+#   PIXABAY_URL=http://127.0.0.1:8800/pixabay/api/ RSS_FEEDS_FILE=stub_feeds.txt python main.py
+
+
+# Rate-Limit-Header wie bei OpenAI, damit rate_limit die Grenzen lernen kann
+RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "10000",
+    "x-ratelimit-remaining-requests": "9999",
+    "x-ratelimit-reset-requests": "6ms",
+    "x-ratelimit-limit-tokens": "2000000",
+    "x-ratelimit-remaining-tokens": "1998000",
+    "x-ratelimit-reset-tokens": "60ms",
+}
+
+
+def canned_reply(prompt_txt):
+    title = "Testmeldung"
+    for line in prompt_txt.splitlines():
+        if "'" in line:
+            parts = line.split("'")
+            if len(parts) >= 3 and parts[-2].strip():
+                title = parts[-2].strip()
+    body = "\n\n".join(
+        f"Absatz {i}: Dies ist ein generierter Testtext über {title}." for i in range(1, 5)
+    )
+    return f"{title} (DE)\n\n{body}\n\n[Kategorie: IT]\n[Schlagwort: Test]"
+
+
+def canned_json_reply(prompt_txt):
+    article = canned_reply(prompt_txt).split("\n\n")
+    return json.dumps({
+        "title": article[0],
+        "paragraphs": article[1:-1],
+        "category": "IT",
+        "keyword": "Test",
+    }, ensure_ascii=False)
+
+
+def chat_completion(body):
+    prompt_txt = body["messages"][-1]["content"]
+    # Mit response_format (JSON-Modus) antwortet der Stub als JSON-Objekt
+    reply = canned_json_reply(prompt_txt) if body.get("response_format") else canned_reply(prompt_txt)
+    prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+    return {
+        "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": reply},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(reply) // 4,
+            "total_tokens": prompt_tokens + len(reply) // 4,
+        },
+    }
+
+
+def _words(seed, count):
+    # Eindeutiges Vokabular pro Eintrag, damit die Near-Dup-Erkennung nicht anschlägt
+    words = []
+    for k in range(count):
+        digest = hashlib.blake2b(f"{seed}:{k}".encode(), digest_size=4).hexdigest()
+        words.append(f"w{digest}")
+    return " ".join(words)
+
+
+def synthetic_feed(feed_no, entries, words=80, base_url=""):
+    now = time.time()
+    items = []
+    for i in range(entries):
+        published = email.utils.formatdate(now - (feed_no * 7 + i) * 600, usegmt=True)
+        items.append(
+            f"<item><title>Story {feed_no}-{i} about {_words(f'title{feed_no}-{i}', 3)}</title>"
+            f"<link>{base_url}/articles/{feed_no}/{i}</link>"
+            f"<pubDate>{published}</pubDate>"
+            f"<description>{_words(f'{feed_no}-{i}', words)}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Stub-Feed {feed_no}</title><link>{base_url}/</link>"
+        f"{''.join(items)}</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_image(width=1600, height=1000):
+    # Echtes JPEG, wenn Pillow da ist; sonst ein Platzhalter mit JPEG-Signatur
+    try:
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff\xe0" + bytes(width * height // 10)
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 90, 160)).save(buf, "JPEG", quality=95)
+    return buf.getvalue()
+
+
+class StubState:
+    def __init__(self, chat_latency=0.0, batch_polls=1, feeds=3, entries_per_feed=5,
+                 wp_latency=0.0, pixabay_latency=0.0, image_pool=20):
+        self.chat_latency = chat_latency
+        self.batch_polls = batch_polls  # wie oft "in_progress" gemeldet wird
+        self.feeds = feeds
+        self.entries_per_feed = entries_per_feed
+        self.wp_latency = wp_latency
+        self.pixabay_latency = pixabay_latency
+        self.image_pool = image_pool  # so viele verschiedene Bilder liefert die Pixabay-Suche
+        self.files = {}
+        self.batches = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._image = None
+
+    def image(self):
+        with self.lock:
+            if self._image is None:
+                self._image = make_image()
+            return self._image
+
+    def count(self, method, prefix):
+        with self.lock:
+            return sum(1 for m, p in self.requests if m == method and p.startswith(prefix))
+
+    def next_id(self, prefix):
+        with self.lock:
+            return f"{prefix}-{next(self._ids)}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload, content_type="application/json", headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _record(self):
+        with self.state.lock:
+            self.state.requests.append((self.command, self.path))
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def _pixabay(self, query):
+        if self.state.pixabay_latency:
+            time.sleep(self.state.pixabay_latency)
+        q = (parse_qs(query).get("q") or [""])[0]
+        first = int(hashlib.blake2b(q.encode(), digest_size=4).hexdigest(), 16)
+        hits = []
+        for n in range(3):
+            image_id = 1000 + (first + n) % max(1, self.state.image_pool)
+            hits.append({
+                "id": image_id,
+                "pageURL": f"https://pixabay.com/photos/stub-{image_id}/",
+                "largeImageURL": f"{self._base_url()}/images/{image_id}.jpg",
+                "webformatURL": f"{self._base_url()}/images/{image_id}.jpg",
+                "tags": "stub, test",
+            })
+        self._send(200, {"total": len(hits), "totalHits": len(hits), "hits": hits},
+                   headers={"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "99", "X-RateLimit-Reset": "60"})
+
+    def _wp_write(self, path, body):
+        if self.state.wp_latency:
+            time.sleep(self.state.wp_latency)
+        object_id = int(self.state.next_id("wp").split("-")[1])
+        if path == "/wp-json/wp/v2/tags":
+            return self._send(201, {"id": object_id, "name": json.loads(body or b"{}").get("name", "")})
+        if path == "/wp-json/wp/v2/media":
+            return self._send(201, {"id": object_id, "source_url": f"{self._base_url()}/uploads/{object_id}.jpg"})
+        self._send(201, {"id": object_id, "link": f"{self._base_url()}/?p={object_id}"})
+
+    def do_GET(self):
+        self._record()
+        url = urlparse(self.path)
+        path = url.path
+        if path.startswith("/feeds/"):
+            feed_no = int(path.rsplit("/", 1)[-1].split(".")[0])
+            return self._send(200, synthetic_feed(feed_no, self.state.entries_per_feed, base_url=self._base_url()),
+                              "application/rss+xml")
+        if path == "/pixabay/api/":
+            return self._pixabay(url.query)
+        if path.startswith("/images/"):
+            return self._send(200, self.state.image(), "image/jpeg")
+        if path in ("/wp-json/wp/v2/tags", "/wp-json/wp/v2/media"):
+            return self._send(200, [], headers={"X-WP-Total": "0", "X-WP-TotalPages": "1"})
+        if path.startswith("/v1/batches/"):
+            return self._get_batch(path.rsplit("/", 1)[-1])
+        if path.startswith("/v1/files/") and path.endswith("/content"):
+            file_id = path.split("/")[3]
+            content = self.state.files.get(file_id)
+            if content is None:
+                return self._send(404, {"error": {"message": "file not found"}})
+            return self._send(200, content, "application/octet-stream")
+        self._send(404, {"error": {"message": f"unknown path {path}"}})
+
+    def do_POST(self):
+        self._record()
+        path = urlparse(self.path).path
+        body = self._body()
+        if path == "/v1/chat/completions":
+            request = json.loads(body)
+            if request.get("stream"):
+                return self._stream_completion(request)
+            if self.state.chat_latency:
+                time.sleep(self.state.chat_latency)
+            return self._send(200, chat_completion(request), headers=RATE_LIMIT_HEADERS)
+        if path == "/v1/files":
+            return self._upload_file(body)
+        if path == "/v1/batches":
+            return self._create_batch(json.loads(body))
+        if path in ("/wp-json/wp/v2/posts", "/wp-json/wp/v2/media", "/wp-json/wp/v2/tags"):
+            return self._wp_write(path, body)
+        self._send(404, {"error": {"message": f"unknown path {path}"}})
+
+    def _stream_completion(self, request):
+        # Server-Sent Events wie bei OpenAI; die Latenz verteilt sich auf die Stücke
+        completion = chat_completion(request)
+        reply = completion["choices"][0]["message"]["content"]
+        pieces = [reply[i:i + 20] for i in range(0, len(reply), 20)]
+        delay = self.state.chat_latency / max(1, len(pieces))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        for key, value in RATE_LIMIT_HEADERS.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, usage=None):
+            chunk = {
+                "id": completion["id"], "object": "chat.completion.chunk",
+                "created": completion["created"], "model": completion["model"],
+                "choices": choices, "usage": usage,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for piece in pieces:
+                if delay:
+                    time.sleep(delay)
+                event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event([], completion["usage"])
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client hat den Stream abgebrochen
+
+    def _upload_file(self, body):
+        raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+        message = email.parser.BytesParser().parsebytes(raw)
+        content = b""
+        for part in message.get_payload():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+        file_id = self.state.next_id("file")
+        self.state.files[file_id] = content
+        self._send(200, {
+            "id": file_id, "object": "file", "bytes": len(content),
+            "created_at": int(time.time()), "filename": "batch.jsonl", "purpose": "batch",
+        })
+
+    def _batch_object(self, batch):
+        return {
+            "id": batch["id"],
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": batch["input_file_id"],
+            "completion_window": "24h",
+            "status": batch["status"],
+            "output_file_id": batch.get("output_file_id"),
+            "created_at": batch["created_at"],
+            "request_counts": {
+                "total": batch["total"],
+                "completed": batch["total"] if batch["status"] == "completed" else 0,
+                "failed": 0,
+            },
+        }
+
+    def _create_batch(self, body):
+        input_file_id = body["input_file_id"]
+        if input_file_id not in self.state.files:
+            return self._send(404, {"error": {"message": "input file not found"}})
+        lines = [l for l in self.state.files[input_file_id].decode("utf-8").splitlines() if l.strip()]
+        batch = {
+            "id": self.state.next_id("batch"),
+            "input_file_id": input_file_id,
+            "status": "validating",
+            "created_at": int(time.time()),
+            "total": len(lines),
+            "polls": 0,
+        }
+        self.state.batches[batch["id"]] = batch
+        self._send(200, self._batch_object(batch))
+
+    def _get_batch(self, batch_id):
+        batch = self.state.batches.get(batch_id)
+        if batch is None:
+            return self._send(404, {"error": {"message": "batch not found"}})
+        batch["polls"] += 1
+        if batch["status"] != "completed":
+            if batch["polls"] > self.state.batch_polls:
+                self._complete_batch(batch)
+            else:
+                batch["status"] = "in_progress"
+        self._send(200, self._batch_object(batch))
+
+    def _complete_batch(self, batch):
+        output = []
+        for line in self.state.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            output.append(json.dumps({
+                "id": f"batch_req_{request['custom_id']}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": chat_completion(request["body"])},
+                "error": None,
+            }, ensure_ascii=False))
+        file_id = self.state.next_id("file")
+        self.state.files[file_id] = ("\n".join(output) + "\n").encode("utf-8")
+        batch["output_file_id"] = file_id
+        batch["status"] = "completed"
+
+
+def feed_list(base_url, feeds):
+    # Inhalt für eine rss_feeds.txt, die auf die synthetischen Feeds zeigt
+    return "\n".join(f"{base_url}/feeds/{n}.xml" for n in range(feeds)) + "\n"
+
+
+def start_stub_server(port=0, **state_kwargs):
+    # Startet den Stub in einem Hintergrund-Thread; gibt (Server, Basis-URL) zurück
+    handler = type("Handler", (StubHandler,), {"state": StubState(**state_kwargs)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Stub für OpenAI, Feeds, Pixabay und WordPress")
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--chat-latency', type=float, default=0.0, help='Künstliche Latenz pro Chat-Completion (s)')
+    parser.add_argument('--wp-latency', type=float, default=0.0, help='Künstliche Latenz pro WordPress-Schreibzugriff (s)')
+    parser.add_argument('--feeds', type=int, default=3, help='Anzahl synthetischer Feeds')
+    parser.add_argument('--entries', type=int, default=5, help='Einträge pro Feed')
+    args = parser.parse_args()
+    server, base_url = start_stub_server(
+        args.port, chat_latency=args.chat_latency, wp_latency=args.wp_latency,
+        feeds=args.feeds, entries_per_feed=args.entries,
+    )
+    with open("stub_feeds.txt", "w", encoding="utf-8") as f:
+        f.write(feed_list(base_url, args.feeds))
+    print(f"Stub läuft: OPENAI_BASE_URL={base_url}/v1 WP_URL={base_url} "
+          f"PIXABAY_URL={base_url}/pixabay/api/ RSS_FEEDS_FILE=stub_feeds.txt")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,123 @@
+import html
+import logging
+import re
+import threading
+import time
+
+import http_client
+from config import DB_PATH, TAG_CACHE_TTL_HOURS, WP_URL, WP_USER, WP_APP_PASSWORD
+from storage import get_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wp_tags (
+    norm TEXT PRIMARY KEY,
+    tag_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+"""
+
+
+def normalize_tag(name):
+    # WordPress liefert Namen HTML-escaped ("&amp;"); Vergleich ohne Groß/Klein und Mehrfach-Leerzeichen
+    return re.sub(r"\s+", " ", html.unescape(name or "")).strip().casefold()
+
+
+class TagResolver:
+    # Schlagwort -> WP-Tag-ID über einen lokalen Cache. Alle Tags werden beim
+    # Start (bzw. wenn der Cache alt ist) seitenweise geladen; danach kostet ein
+    # bekanntes Tag keinen Request und ein neues genau einen (POST).
+    def __init__(self, path=DB_PATH, ttl_hours=TAG_CACHE_TTL_HOURS, url=WP_URL, auth=(WP_USER, WP_APP_PASSWORD),
+                 rate_key=None):
+        self.db = get_db(path)
+        self.db.executescript(SCHEMA)
+        self.ttl_hours = ttl_hours
+        self.url = url
+        self.auth = auth
+        self.rate_key = rate_key
+        self._lock = threading.Lock()
+        self._name_locks = {}
+
+    def _store(self, name, tag_id):
+        self.db.execute(
+            "INSERT OR REPLACE INTO wp_tags (norm, tag_id, name, updated_at) VALUES (?, ?, ?, ?)",
+            (normalize_tag(name), tag_id, html.unescape(name), int(time.time())),
+        )
+
+    def lookup(self, name):
+        rows = self.db.execute("SELECT tag_id FROM wp_tags WHERE norm = ?", (normalize_tag(name),))
+        return rows[0][0] if rows else None
+
+    def is_stale(self):
+        fetched = float(self.db.get_meta("wp_tags_prefetched_at", 0))
+        return time.time() - fetched > self.ttl_hours * 3600
+
+    def prefetch(self, per_page=100):
+        page, total = 1, 0
+        while True:
+            response = http_client.get(
+                f"{self.url}/wp-json/wp/v2/tags",
+                endpoint="wp",
+                params={"per_page": per_page, "page": page, "_fields": "id,name"},
+                auth=self.auth,
+            )
+            if response.status_code == 400 and page > 1:
+                break
+            response.raise_for_status()
+            tags = response.json()
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO wp_tags (norm, tag_id, name, updated_at) VALUES (?, ?, ?, ?)",
+                    [(normalize_tag(t["name"]), t["id"], html.unescape(t["name"]), int(time.time()))
+                     for t in tags],
+                )
+            total += len(tags)
+            total_pages = int(response.headers.get("X-WP-TotalPages", page))
+            if not tags or page >= total_pages:
+                break
+            page += 1
+        self.db.set_meta("wp_tags_prefetched_at", time.time())
+        logging.info(f"Tag-Cache: {total} WordPress-Tags geladen.")
+        return total
+
+    def ensure_fresh(self):
+        with self._lock:
+            if self.is_stale():
+                try:
+                    self.prefetch()
+                except Exception as e:
+                    logging.warning(f"Tag-Cache konnte nicht aktualisiert werden: {e}")
+
+    def _name_lock(self, norm):
+        with self._lock:
+            return self._name_locks.setdefault(norm, threading.Lock())
+
+    def resolve(self, name):
+        norm = normalize_tag(name)
+        if not norm:
+            return None
+        tag_id = self.lookup(name)
+        if tag_id:
+            return tag_id
+        # Pro Name nur ein Thread legt an; die anderen warten und lesen dann den Cache
+        with self._name_lock(norm):
+            tag_id = self.lookup(name)
+            if tag_id:
+                return tag_id
+            response = http_client.post(
+                f"{self.url}/wp-json/wp/v2/tags",
+                endpoint="wp",
+                json={"name": name.strip()},
+                auth=self.auth,
+                rate_key=self.rate_key,
+            )
+            if response.status_code == 201:
+                tag_id = response.json()["id"]
+            elif response.status_code == 400 and response.json().get("code") == "term_exists":
+                # Gibt es schon (z.B. von einem anderen Prozess angelegt) -> ID übernehmen
+                tag_id = response.json().get("data", {}).get("term_id")
+            if not tag_id:
+                logging.warning(f"Tag '{name}' konnte nicht angelegt werden: {response.status_code} {response.text}")
+                return None
+            self._store(name, tag_id)
+            return tag_id
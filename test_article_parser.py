@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import article_parser
+from article_parser import ParseError, StreamParser, parse_json, parse_reply
+
+REPLY = (
+    "**Titel: Neue GPU vorgestellt**\n"
+    "\n"
+    "Erster Absatz über die GPU.\n"
+    "\n"
+    "Zweiter Absatz mit Details.\n"
+    "[Kategorie: Gaming]\n"
+    "[Schlagwort: Grafikkarte]"
+)
+
+
+def stream(text, chunk_size):
+    parser = StreamParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    return parser
+
+
+def test_parse_reply():
+    article = parse_reply(REPLY)
+    assert article == {
+        "title": "Neue GPU vorgestellt",
+        "body": "Erster Absatz über die GPU.\nZweiter Absatz mit Details.",
+        "category": "Gaming",
+        "keyword": "Grafikkarte",
+    }
+
+
+def test_parse_reply_minimum_lines():
+    article = parse_reply("Titel\nAbsatz.\n[Kategorie: IT]\n[Schlagwort: KI]")
+    assert (article["title"], article["body"], article["category"]) == ("Titel", "Absatz.", "IT")
+    with pytest.raises(ParseError):
+        parse_reply("Titel\n[Kategorie: IT]\n[Schlagwort: KI]")
+
+
+def test_parse_reply_without_markers_uses_default_category():
+    article = parse_reply("Titel\nA\nB\nC")
+    assert article["category"] == article_parser.DEFAULT_CATEGORY
+    assert article["keyword"] == ""
+
+
+def test_parse_json():
+    text = json.dumps({"title": "Titel", "paragraphs": ["A", " ", "B"], "category": "IT", "keyword": "KI"})
+    assert parse_json(text) == {"title": "Titel", "body": "A\n\nB", "category": "IT", "keyword": "KI"}
+
+
+@pytest.mark.parametrize("text", [
+    "kein json",
+    "[1, 2]",
+    json.dumps({"title": "Titel", "paragraphs": [], "category": "IT", "keyword": ""}),
+    json.dumps({"title": "", "paragraphs": ["A"], "category": "IT", "keyword": ""}),
+])
+def test_parse_json_rejects(text):
+    assert not article_parser.is_valid_json(text)
+    with pytest.raises(ParseError):
+        parse_json(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, len(REPLY)])
+def test_stream_parser_chunk_boundaries(chunk_size):
+    parser = stream(REPLY, chunk_size)
+    assert parser.title == "Neue GPU vorgestellt"
+    assert parser.text == REPLY
+
+
+def test_stream_parser_accepts_minimum_reply():
+    text = "Titel\nAbsatz.\n[Kategorie: IT]\n[Schlagwort: KI]"
+    assert stream(text, 1).title == "Titel"
+    assert article_parser.is_valid(text)
+
+
+def test_stream_parser_aborts_on_refusal():
+    with pytest.raises(ParseError):
+        stream("Es tut mir leid, dabei kann ich nicht helfen.", 5)
+
+
+def test_stream_parser_aborts_on_markers_before_body():
+    with pytest.raises(ParseError):
+        stream("Titel\n[Kategorie: IT]\n[Schlagwort: KI]\nText danach\n", 4)
+
+
+def test_stream_parser_aborts_on_overlong_first_line():
+    with pytest.raises(ParseError):
+        stream("x" * (article_parser.TITLE_MAX_CHARS + 1), 50)
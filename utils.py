@@ -1,27 +1,36 @@
 import hashlib
-import os
-import requests
 import logging
+import time
 
-from config import WP_URL, WP_USER, WP_APP_PASSWORD
+import http_client
+import metrics
+import prompt_builder
+import sites
+from image_transfer import log_transfer, prepare_upload
 
-def load_rss_feeds(filename="rss_feeds.txt"):
+def load_feed_config(filename="rss_feeds.txt"):
+    # Eine Zeile pro Feed: URL, optional gefolgt von weight=<Zahl> und category=<Name>,
+    # z.B. "https://example.com/feed weight=1.5 category=Gaming". "#" leitet Kommentare ein.
+    feeds = {}
     with open(filename, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
-
-def load_posted_titles(filename="posted_titles.txt"):
-    if not os.path.exists(filename):
-        return set()
-    with open(filename, "r", encoding="utf-8") as f:
-        return set(line.strip() for line in f if line.strip())
-
-def save_posted_title(title, filename="posted_titles.txt"):
-    with open(filename, "a", encoding="utf-8") as f:
-        f.write(title + "\n")
-
-def save_posted_hash(content_hash, filename="posted_hashes.txt"):
-    with open(filename, "a", encoding="utf-8") as f:
-        f.write(content_hash + "\n")
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            options = {"weight": 1.0, "category": None}
+            for part in parts[1:]:
+                key, _, value = part.partition("=")
+                if key == "weight":
+                    try:
+                        options["weight"] = float(value)
+                    except ValueError:
+                        logging.warning(f"Ungültiges Gewicht in {filename}: {part}")
+                elif key == "category":
+                    options["category"] = value
+                else:
+                    logging.warning(f"Unbekannte Feed-Option in {filename}: {part}")
+            feeds[parts[0]] = options
+    return feeds
 
 def hash_content(content):
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -30,25 +39,59 @@ def to_html_paragraphs(text):
     lines = [line.strip() for line in text.split('\n') if line.strip()]
     return ''.join(f"<p>{line}</p>" for line in lines)
 
-def upload_image_to_wp(image_url, alt_text, source_link):
+def prepare_image(image_url):
+    # Download und ggf. Umwandlung; das Ergebnis können mehrere Seiten hochladen
+    prepared = prepare_upload(image_url)
+    metrics.observe("image_download_seconds", prepared.stats["download_time"])
+    metrics.inc("image_bytes", prepared.stats["original_bytes"], direction="download")
+    return prepared
+
+def upload_image_to_wp(image_url, alt_text, source_link, site=None, image=None):
+    # site: Ziel aus sites.py, ohne Angabe die erste Seite.
+    # image: Funktion, die das für alle Seiten gemeinsam vorbereitete Bild liefert
+    # (PreparedImage, schließt der Aufrufer); ohne Angabe wird es hier geladen.
+    site = site or sites.get_site()
     try:
         if not image_url:
             return None
-        img_data = requests.get(image_url).content
-        headers = {
-            "Content-Disposition": f'attachment; filename="{os.path.basename(image_url)}"',
-            "Content-Type": "image/jpeg",
-        }
-        response = requests.post(
-            f"{WP_URL}/wp-json/wp/v2/media?alt_text=Bildquelle%3A+{source_link}",
-            headers=headers,
-            auth=(WP_USER, WP_APP_PASSWORD),
-            data=img_data,
-            timeout=60
-        )
+        index = site.media_index
+        # Dasselbe Pixabay-Bild wurde schon hochgeladen -> vorhandenes Medium verwenden
+        media_id = index.find(page_url=source_link)
+        if media_id:
+            logging.info(f"Bild schon in WordPress, verwende Medien-ID {media_id}")
+            metrics.inc("media_reused", match="page")
+            return media_id
+        # Gestreamt: Download in eine Spool-Datei, ggf. verkleinern, dann stückweise hochladen
+        prepared = image() if image else prepare_image(image_url)
+        try:
+            stats = prepared.stats
+            media_id = index.find_hash(stats["content_hash"])
+            if media_id:
+                index.record(media_id, page_url=source_link, content_hash=stats["content_hash"], source_url=image_url)
+                logging.info(f"Gleiches Bild (Hash) schon in WordPress, verwende Medien-ID {media_id}")
+                metrics.inc("media_reused", match="hash")
+                return media_id
+            start = time.monotonic()
+            response = http_client.post(
+                f"{site.url}/wp-json/wp/v2/media",
+                endpoint="wp_media",
+                params={"alt_text": f"Bildquelle: {source_link}"},
+                headers=prepared.headers,
+                auth=site.auth,
+                rate_key=site.rate_key,
+                data=prepared.stream(),
+            )
+        finally:
+            if not image:
+                prepared.close()
         if response.status_code == 201:
             media_id = response.json()["id"]
             logging.info(f"Bild hochgeladen, ID: {media_id}")
+            upload_time = time.monotonic() - start
+            log_transfer(image_url, stats, upload_time)
+            metrics.observe("image_upload_seconds", upload_time)
+            metrics.inc("image_bytes", stats["upload_bytes"], direction="upload")
+            index.record(media_id, page_url=source_link, content_hash=stats["content_hash"], source_url=image_url)
             return media_id
         else:
             logging.warning(f"Bild-Upload fehlgeschlagen: {response.status_code} {response.text}")
@@ -56,22 +99,19 @@ def upload_image_to_wp(image_url, alt_text, source_link):
         logging.warning(f"Fehler beim Bild-Upload: {e}")
     return None
 
-def get_or_create_tag_id(keyword):
-    # Dummy (immer None) – ergänze hier ggf. echte Logik, falls Tags benutzt werden sollen!
-    return None
+def get_or_create_tag_id(keyword, site=None):
+    if not keyword:
+        return None
+    try:
+        return (site or sites.get_site()).tags.resolve(keyword)
+    except Exception as e:
+        logging.warning(f"Fehler bei Tag '{keyword}': {e}")
+        return None
 
 def send_health_report(success, error, dauer):
     print(f"[Health] Success: {success} | Error: {error} | Dauer: {dauer}s")
 
 def make_prompt(summary, title):
-    return (
-        f"Übersetze den folgenden englischen Titel ins Deutsche, aber lasse Eigennamen, Marken, Produktnamen und Eventtitel (wie 'Snowflake Summit') IMMER im Original stehen.\n"
-        f"Gib ausschließlich den so übersetzten deutschen Titel als erste Zeile aus: '{title}'.\n"
-        f"Darunter schreibe einen ausführlichen, modernen, sachlichen News-Text auf Deutsch (mindestens 300 Wörter), suchmaschinenoptimiert, für technikaffine Männer zwischen 24 und 40 Jahren.\n"
-        f"Baue ein aussagekräftiges SEO-Schlagwort sinnvoll mehrfach in den Text ein.\n"
-        f"Absätze bitte durch Leerzeilen trennen.\n"
-        f"Am Ende ANTWORTE NUR mit [Kategorie: <Name>] (eine aus: Gaming, IT, Mobile, Creator) und darunter [Schlagwort: <Keyword>].\n"
-        f"KEINE weiteren Erklärungen oder Zusatzinfos!\n"
-        f"Gib NUR den deutschen Titel (ohne Sternchen, Anführungszeichen oder andere Sonderzeichen am Anfang/Ende), darunter den Fließtext, dann Kategorie und Schlagwort zurück.\n\n"
-        f"{summary}"
-    )
+    # Nur der variable Teil (Titel + bereinigter, gekürzter Text); die festen
+    # Anweisungen aus prompt.txt stehen im System-Prompt
+    return prompt_builder.user_prompt(title, summary)